@@ -1,8 +1,9 @@
 # crud.py (업데이트 버전)
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from models import OCRRecord
-from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, and_, or_
+from models import OCRRecord, OCRJob
+from datetime import datetime, timedelta
 import json
 
 # 1) OCR 전용 생성(기존 유지) — 나중에 필요하면 계속 사용
@@ -22,8 +23,7 @@ def create_ocr_record(
         tier=tier,
     )
     db.add(rec)
-    db.commit()
-    db.refresh(rec)
+    db.commit()   # expire_on_commit=False → id가 채워진 채로 반환(refresh 불필요)
     return rec
 
 # 2) 🔥 통합 생성: OCR + 세그멘테이션 + 시각화까지 한 번에 저장
@@ -35,7 +35,8 @@ def create_full_record(
     seg_json: dict | str,
     vis_path: str | None = None,
     score: int = 0,
-    tier: str = "default"
+    tier: str = "default",
+    ocr_json_path: str | None = None
 ) -> OCRRecord:
     rec = OCRRecord(
         filename=filename,
@@ -45,10 +46,22 @@ def create_full_record(
         vis_path=vis_path,
         score=score,
         tier=tier,
+        ocr_json_path=ocr_json_path,
     )
     db.add(rec)
+    db.commit()   # expire_on_commit=False → id가 채워진 채로 반환(refresh 불필요)
+    return rec
+
+# 2-1) 재처리 결과 반영: 지정한 필드만 갱신(dict는 JSON 문자열로 저장)
+def update_full_record(db: Session, record_id: int, **fields) -> OCRRecord | None:
+    rec = db.get(OCRRecord, record_id)
+    if rec is None:
+        return None
+    for key, value in fields.items():
+        if key in ("parsed", "seg_json") and isinstance(value, dict):
+            value = json.dumps(value, ensure_ascii=False)
+        setattr(rec, key, value)
     db.commit()
-    db.refresh(rec)
     return rec
 
 # 3) get — 최신 스타일
@@ -59,3 +72,110 @@ def get_record(db: Session, record_id: int) -> OCRRecord | None:
 def list_records(db: Session, limit: int = 50):
     stmt = select(OCRRecord).order_by(OCRRecord.id.desc()).limit(limit)
     return db.execute(stmt).scalars().all()
+
+# 5) 비동기 조회(AsyncSession)
+async def aget_record(db: AsyncSession, record_id: int) -> OCRRecord | None:
+    return await db.get(OCRRecord, record_id)
+
+async def alist_records(db: AsyncSession, limit: int = 50):
+    stmt = select(OCRRecord).order_by(OCRRecord.id.desc()).limit(limit)
+    return (await db.execute(stmt)).scalars().all()
+
+# 6) 워커 큐(OCRJob)
+def enqueue_job(db: Session, *, doc_dir: str, record_id: int | None = None,
+                force: str | None = None, max_attempts: int = 3) -> OCRJob:
+    job = OCRJob(doc_dir=doc_dir, record_id=record_id, force=force,
+                 status="pending", attempts=0, max_attempts=max_attempts)
+    db.add(job)
+    db.commit()
+    return job
+
+def _claimable(now: datetime):
+    # 대기 중이거나, 실행 중이지만 임대가 만료된(워커 크래시) 작업
+    return and_(
+        OCRJob.attempts < OCRJob.max_attempts,
+        or_(OCRJob.status == "pending",
+            and_(OCRJob.status == "running", OCRJob.lease_expires_at < now)),
+    )
+
+def claim_job(db: Session, worker_id: str, lease_s: int = 120) -> OCRJob | None:
+    """
+    작업 1건 선점.
+    - MySQL/PostgreSQL: SELECT ... FOR UPDATE SKIP LOCKED
+    - SQLite: 후보 id에 조건부 UPDATE(rowcount=1이면 선점 성공)
+    """
+    now = datetime.utcnow()
+    claim = dict(status="running", attempts=OCRJob.attempts + 1, lease_owner=worker_id,
+                 lease_expires_at=now + timedelta(seconds=lease_s), heartbeat_at=now, updated_at=now)
+
+    # 재시도 한도를 넘긴 채 임대가 만료된 작업은 실패 처리
+    db.execute(
+        update(OCRJob)
+        .where(OCRJob.status == "running", OCRJob.lease_expires_at < now,
+               OCRJob.attempts >= OCRJob.max_attempts)
+        .values(status="failed", error="lease expired (max attempts)", updated_at=now)
+    )
+    db.commit()
+
+    if db.bind.dialect.name in ("mysql", "mariadb", "postgresql"):
+        stmt = (select(OCRJob.id).where(_claimable(now)).order_by(OCRJob.id)
+                .limit(1).with_for_update(skip_locked=True))
+        job_id = db.execute(stmt).scalar_one_or_none()
+        if job_id is None:
+            db.rollback()
+            return None
+        db.execute(update(OCRJob).where(OCRJob.id == job_id).values(**claim))
+        db.commit()
+        return db.get(OCRJob, job_id, populate_existing=True)
+
+    candidates = db.execute(
+        select(OCRJob.id).where(_claimable(now)).order_by(OCRJob.id).limit(8)
+    ).scalars().all()
+    for job_id in candidates:
+        res = db.execute(update(OCRJob).where(OCRJob.id == job_id, _claimable(now)).values(**claim))
+        db.commit()
+        if res.rowcount == 1:
+            return db.get(OCRJob, job_id, populate_existing=True)
+    return None
+
+def heartbeat_job(db: Session, job_id: int, worker_id: str, lease_s: int = 120) -> bool:
+    """임대 연장. False면 임대를 잃은 것(다른 워커가 가져감)"""
+    now = datetime.utcnow()
+    res = db.execute(
+        update(OCRJob)
+        .where(OCRJob.id == job_id, OCRJob.lease_owner == worker_id, OCRJob.status == "running")
+        .values(heartbeat_at=now, lease_expires_at=now + timedelta(seconds=lease_s), updated_at=now)
+    )
+    db.commit()
+    return res.rowcount == 1
+
+def finish_job(db: Session, job_id: int, worker_id: str, error: str | None = None) -> None:
+    """성공(done) 또는 실패 기록 — 실패는 재시도 한도 안이면 다시 pending"""
+    job = db.get(OCRJob, job_id, populate_existing=True)
+    if job is None or job.lease_owner != worker_id:
+        return
+    now = datetime.utcnow()
+    if error is None:
+        job.status, job.error = "done", None
+    else:
+        job.status = "pending" if job.attempts < job.max_attempts else "failed"
+        job.error = error[:2000]
+    job.lease_owner, job.lease_expires_at, job.updated_at = None, None, now
+    db.commit()
+
+def get_job(db: Session, job_id: int) -> OCRJob | None:
+    return db.get(OCRJob, job_id, populate_existing=True)
+
+def get_record_job(db: Session, record_id: int) -> OCRJob | None:
+    """레코드의 가장 최근 작업"""
+    stmt = select(OCRJob).where(OCRJob.record_id == record_id).order_by(OCRJob.id.desc()).limit(1)
+    return db.execute(stmt).scalars().first()
+
+def job_state(job: OCRJob) -> str:
+    """
+    표시용 상태. 마지막 시도 중 워커가 죽어 임대가 만료된 작업은 다시 잡히지 않으므로 failed로 본다
+    """
+    if (job.status == "running" and job.attempts >= job.max_attempts
+            and job.lease_expires_at is not None and job.lease_expires_at < datetime.utcnow()):
+        return "failed"
+    return job.status
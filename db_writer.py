@@ -0,0 +1,149 @@
+# db_writer.py — OCRRecord write-behind 배치 저장
+"""
+동시 요청의 INSERT를 모아 하나의 트랜잭션으로 커밋.
+- submit(): 레코드 필드를 큐에 넣고, 커밋 후 id를 돌려주는 Future 반환
+- 대기 중인 요청이 없으면 즉시 flush(단건 지연 없음), 이미 쌓여 있으면 max_batch개 또는 max_delay_ms까지 모아 flush
+- flush 시 id는 INSERT 결과로 채워지므로 refresh 왕복 없음
+- 비동기 엔진(AsyncSessionLocal)이 있으면 사용, 없으면 동기 세션을 스레드에서 실행
+"""
+from __future__ import annotations
+
+import asyncio, json, os
+from typing import Any, Dict, List, Tuple
+
+from db import SessionLocal, AsyncSessionLocal
+from models import OCRRecord
+
+WRITE_BATCH = int(os.getenv("DB_WRITE_BATCH", "64"))
+WRITE_DELAY_MS = int(os.getenv("DB_WRITE_DELAY_MS", "20"))
+
+
+def _record(fields: Dict[str, Any]) -> OCRRecord:
+    # crud.create_* 와 동일하게 dict는 JSON 문자열로 저장
+    data = dict(fields)
+    for key in ("parsed", "seg_json"):
+        if isinstance(data.get(key), dict):
+            data[key] = json.dumps(data[key], ensure_ascii=False)
+    return OCRRecord(**data)
+
+
+class WriteBehindWriter:
+    def __init__(self, max_batch: int = WRITE_BATCH, max_delay_ms: int = WRITE_DELAY_MS):
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000.0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.stats = {"batches": 0, "records": 0, "max_batch": 0, "retried": 0}
+
+    # ---------------- 수명주기 ----------------
+    def start(self) -> None:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """남은 작업 모두 커밋 후 종료"""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    # ---------------- API ----------------
+    def submit(self, **fields) -> asyncio.Future:
+        """OCRRecord 필드 → 커밋 후 id가 채워지는 Future"""
+        if self._task is None:
+            self.start()
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((fields, fut))
+        return fut
+
+    async def create(self, **fields) -> int:
+        return await self.submit(**fields)
+
+    # ---------------- 내부 ----------------
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            batch: List[Tuple[Dict[str, Any], asyncio.Future]] = [item]
+            # 뒤에 대기 중인 요청이 없으면 바로 flush → 단건 업로드는 배치 지연을 내지 않음
+            # (동시 업로드/직전 flush 중 도착한 요청이 쌓여 있을 때만 max_delay 동안 더 모음)
+            linger = not self._queue.empty()
+            deadline = loop.time() + self.max_delay
+            while linger and len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    nxt = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if nxt is None:
+                    stopping = True
+                    break
+                batch.append(nxt)
+            await self._flush(batch)
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> List[int]:
+        if AsyncSessionLocal is not None:
+            return await self._insert_async(rows)
+        return await asyncio.to_thread(self._insert_sync, rows)
+
+    async def _flush(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            ids = await self._insert([f for f, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(e)
+                return
+            # 한 행의 오류(제약/인코딩)가 배치 전체를 실패시키지 않도록 행 단위로 재시도
+            self.stats["retried"] += 1
+            for fields, fut in batch:
+                try:
+                    rid = (await self._insert([fields]))[0]
+                except Exception as row_e:
+                    if not fut.done():
+                        fut.set_exception(row_e)
+                    continue
+                if not fut.done():
+                    fut.set_result(rid)
+            return
+        for (_, fut), rid in zip(batch, ids):
+            if not fut.done():
+                fut.set_result(rid)
+        self.stats["batches"] += 1
+        self.stats["records"] += len(batch)
+        self.stats["max_batch"] = max(self.stats["max_batch"], len(batch))
+
+    async def _insert_async(self, rows: List[Dict[str, Any]]) -> List[int]:
+        recs = [_record(r) for r in rows]
+        async with AsyncSessionLocal() as db:
+            async with db.begin():
+                db.add_all(recs)
+                await db.flush()
+                return [r.id for r in recs]
+
+    @staticmethod
+    def _insert_sync(rows: List[Dict[str, Any]]) -> List[int]:
+        recs = [_record(r) for r in rows]
+        db = SessionLocal()
+        try:
+            db.add_all(recs)
+            db.flush()
+            ids = [r.id for r in recs]
+            db.commit()
+            return ids
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+# 앱 전역 writer (main.py startup/shutdown에서 start/close)
+writer = WriteBehindWriter()
@@ -1,24 +1,34 @@
 from __future__ import annotations
 from models import Base, OCRRecord
-from fastapi import FastAPI, UploadFile, File, Request, HTTPException, Depends
-from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse
+from fastapi import FastAPI, UploadFile, File, Request, HTTPException, Depends, BackgroundTasks
+from fastapi.responses import HTMLResponse, RedirectResponse, FileResponse, Response, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
 from importlib import import_module
 from pathlib import Path
 from datetime import datetime
-import os, json, time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from functools import lru_cache
+from collections import OrderedDict
+import os, json, time, asyncio
 import cv2
 
 # DB
-from db import get_db, engine
-from crud import create_ocr_record, create_full_record, get_record, list_records
+from db import get_db, engine, init_sqlite_schema, init_job_schema, SessionLocal, AsyncSessionLocal
+from crud import create_ocr_record, create_full_record, get_record, list_records, aget_record, get_job, get_record_job, job_state
+from db_writer import writer as db_writer
 
 # 세그멘테이션 / 시각화 / OCR 연결
-from services.segment import segment_layout
-from services.visualize import save_overlay
-from services.ocr_service import ocr_text_region, save_upload_to_png
+from services.segment import segment_layout, segment_layout_array, scale_layout
+from services.visualize import save_overlay, render_overlay
+from services.ocr_service import ocr_text_region, detect_page_script, save_upload_to_png, load_upload_preview
+from services import ocr_service
+from services import pipeline
+from services import tiles
+from services import export as exporter
+from services import page_buffer
+from utils.word_geometry import WordGeometry
 
 
 # -----------------------------------------------------------------------------
@@ -35,6 +45,53 @@ def _as_obj(maybe_json):
             return {"_raw": maybe_json}
     return {}
 
+def _clamp_bbox(bbox, W: int, H: int) -> list[int]:
+    x1, y1, x2, y2 = map(int, bbox[:4])
+    return [max(0, x1), max(0, y1), min(W - 1, x2), min(H - 1, y2)]
+
+def _process_block(idx: int, b: dict, png_path, bgr_full, stem: str, ts: str,
+                   ocr_kw: dict | None = None) -> dict:
+    """
+    블록 1개 처리(텍스트 → 영역 OCR, 표 → 썸네일 저장). b를 제자리 갱신 후 반환
+    - png_path: 경로 또는 디코딩된 페이지 배열
+    - ocr_kw: 영역 OCR 인자(페이지 감지 결과 lang/rotate)
+    """
+    ocr_kw = ocr_kw or {}
+    H, W = bgr_full.shape[:2]
+    typ = (b.get("type") or b.get("cls") or "").lower()
+    bbox = b.get("bbox") or b.get("box") or b.get("poly")
+    if not bbox or len(bbox) < 4:
+        b["warn"] = "invalid_bbox"
+        return b
+
+    # 좌표 클램핑
+    x1, y1, x2, y2 = _clamp_bbox(bbox, W, H)
+
+    if typ == "text":
+        try:
+            b["ocr"] = ocr_text_region(png_path, [x1, y1, x2, y2], **ocr_kw)
+        except Exception as ocr_e:
+            b["ocr_error"] = str(ocr_e)
+
+    elif typ == "table":
+        crop = bgr_full[y1:y2, x1:x2]
+        if crop.size:
+            tbl_name = f"{stem}_{ts}_t{idx}.png"
+            tbl_abs = BASE_DIR / "captures" / "tables" / tbl_name
+            cv2.imwrite(str(tbl_abs), crop)
+            b.setdefault("table", {})
+            b["table"]["image_url"] = f"/captures/tables/{tbl_name}"
+            if "content" in b and b["content"] is not None:
+                b["table"]["raw"] = b["content"]
+    return b
+
+# 영역 OCR 병렬 처리 풀(스트리밍 경로). Tesseract는 별도 프로세스라 스레드로 충분
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "2"))
+_ocr_pool = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+
+# 업로드 처리 방식: inline(요청 안에서 파이프라인 실행) | queue(ocr_jobs 적재 → python -m services.worker)
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "inline").lower()
+
 # -----------------------------------------------------------------------------
 # 앱/정적 경로
 # -----------------------------------------------------------------------------
@@ -49,6 +106,23 @@ os.makedirs(BASE_DIR / "captures" / "tables", exist_ok=True)
 app.mount("/captures", StaticFiles(directory=str(BASE_DIR / "captures")), name="captures")
 app.mount("/uploads", StaticFiles(directory=str(BASE_DIR / "uploads")), name="uploads")
 
+# DB: SQLite 프로필 스키마 생성 + write-behind 배치 저장기 시작/종료(남은 배치 커밋)
+@app.on_event("startup")
+async def _startup():
+    init_sqlite_schema()
+    if PIPELINE_MODE == "queue":
+        # 얇은 웹 계층: OCR 모델은 워커만 로딩(여기서는 필요한 요청이 오면 지연 로딩)
+        init_job_schema()
+    else:
+        await asyncio.to_thread(ocr_service.warmup)
+    db_writer.start()
+
+@app.on_event("shutdown")
+async def _shutdown():
+    await db_writer.close()
+    page_buffer.shutdown_pool()
+    page_buffer.pages.close_all()
+
 # -----------------------------------------------------------------------------
 # 홈
 # -----------------------------------------------------------------------------
@@ -79,16 +153,15 @@ async def upload_html(
         result = OCR.run_ocr_on_upload(
             file, raw,
             mode="doc",
-            lang="kor+eng",
+            lang="auto",   # 스크립트 감지(수동 지정: "kor+eng" 등)
             use_paddle=True,
             use_easyocr=True,
         )
         text = result.get("text", "(인식 결과 없음)")
         meta = result.get("meta", {})
 
-        # DB 저장
-        rec = create_ocr_record(
-            db,
+        # DB 저장(write-behind: 동시 요청과 한 트랜잭션으로 묶여 커밋, id만 돌려받음)
+        rec_id = await db_writer.create(
             filename=file.filename,
             raw_text=text,
             parsed=meta,
@@ -96,7 +169,7 @@ async def upload_html(
             tier="N/A",
         )
         # ✅ 바로 상세 페이지로 이동
-        return RedirectResponse(url=f"/documents/{rec.id}", status_code=303)
+        return RedirectResponse(url=f"/documents/{rec_id}", status_code=303)
 
     except Exception as e:
         return templates.TemplateResponse(
@@ -108,28 +181,59 @@ async def upload_html(
 # (2-A) 세그멘테이션 미리보기(시각화 이미지만 반환)
 # -----------------------------------------------------------------------------
 @app.post("/segment_preview")
-async def segment_preview(file: UploadFile = File(...)):
+async def segment_preview(
+    file: UploadFile = File(...),
+    mode: str = "preview",   # preview: 저해상도·메모리 전용 / full: 원본 해상도 + captures 저장
+    format: str = "png",     # png: 오버레이 이미지 / json: 원본 좌표 레이아웃
+):
     try:
         raw = await file.read()
         if not raw:
             raise HTTPException(400, "빈 파일입니다.")
 
-        # 1) PNG 저장 (절대경로 기대)
-        png_path = save_upload_to_png(file, raw)
-
-        # 2) 세그멘테이션
-        layout = segment_layout(png_path)
-
-        # 3) 오버레이 저장 (절대경로)
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        stem = Path(file.filename).stem
-        overlay_name = f"{stem}_{ts}_overlay.png"
-        overlay_abs = BASE_DIR / "captures" / overlay_name
-        save_overlay(png_path, layout, str(overlay_abs))
-
-        # 4) 이미지 파일 응답 (절대경로)
-        return FileResponse(str(overlay_abs), media_type="image/png")
+        if mode == "full":
+            # 1) PNG 저장 (절대경로 기대)
+            png_path = save_upload_to_png(file, raw)
+
+            # 2) 세그멘테이션
+            layout = segment_layout(png_path)
+
+            # 3) 오버레이 저장 (절대경로)
+            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+            stem = Path(file.filename).stem
+            overlay_name = f"{stem}_{ts}_overlay.png"
+            overlay_abs = BASE_DIR / "captures" / overlay_name
+            save_overlay(png_path, layout, str(overlay_abs))
+
+            # 4) 이미지 파일 응답 (절대경로)
+            return FileResponse(str(overlay_abs), media_type="image/png")
+
+        # 1) 저해상도로 바로 디코딩 (JPEG draft / PDF 저 DPI)
+        bgr, sx, sy = load_upload_preview(file, raw)
+
+        # 2) 축소 이미지에서 세그멘테이션 → 원본 좌표로 환산
+        small = segment_layout_array(bgr)
+        layout = scale_layout(small, sx, sy)
+        scale_hdr = f"{sx:.4f},{sy:.4f}"
+
+        if format == "json":
+            return JSONResponse(
+                {"layout": layout, "preview": {"width": small["width"], "height": small["height"], "scale": [sx, sy]}},
+                headers={"X-Preview-Scale": scale_hdr},
+            )
+
+        # 3) 오버레이를 메모리에서 렌더 후 바로 응답 (디스크 저장 없음)
+        render_overlay(bgr, small, thickness=1, font_scale=0.4)
+        ok, buf = cv2.imencode(".png", bgr)
+        if not ok:
+            raise RuntimeError("오버레이 인코딩 실패")
+        return Response(
+            content=buf.tobytes(), media_type="image/png",
+            headers={"X-Preview-Scale": scale_hdr, "Cache-Control": "no-store"},
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"세그멘테이션 미리보기 실패: {e}")
 
@@ -143,98 +247,230 @@ async def upload_and_segment(
     db: Session = Depends(get_db),
 ):
     try:
-        t0 = time.time()
         raw = await file.read()
         if not raw:
             raise HTTPException(400, "빈 파일입니다.")
 
-        # 1) PNG 저장 (절대경로 기대)
-        png_path = save_upload_to_png(file, raw)
+        if PIPELINE_MODE == "queue":
+            # 원본만 아카이브에 넣고 placeholder 레코드 + 작업 적재 → 워커가 persist에서 채움
+            queued = await asyncio.to_thread(pipeline.enqueue_upload, db, raw, file.filename, file.content_type)
+            return RedirectResponse(url=f"/documents/{queued['record_id']}", status_code=303)
 
-        # 2) 문서 레이아웃 분석
-        layout = segment_layout(png_path)
-        if not isinstance(layout, dict) or "blocks" not in layout:
-            raise RuntimeError("세그멘테이션 결과 형식이 올바르지 않습니다. {'blocks': [...]} 형식 필요")
+        # ingest → rasterize → segment → region_ocr → postprocess → overlay → persist
+        # (스테이지별 산출물은 artifacts/ 에 저장되어 이후 부분 재처리에 재사용)
+        # 동기 파이프라인(OCR/DB)은 스레드에서 → 처리 중에도 이벤트 루프가 다른 요청을 받음
+        result = await asyncio.to_thread(pipeline.run_pipeline, raw, file.filename, file.content_type)
+
+        # ✅ 바로 상세 페이지로 이동
+        return RedirectResponse(url=f"/documents/{result['record_id']}", status_code=303)
 
-        # 3) 각 블록 OCR 수행(텍스트만) & 표 썸네일 저장
-        bgr_full = cv2.imread(png_path)
+    except Exception as e:
+        return templates.TemplateResponse(
+            "index.html",
+            {"request": request, "text": f"❌ {type(e).__name__}: {e}"}
+        )
+
+# -----------------------------------------------------------------------------
+# (2-C) 풀 파이프라인 스트리밍(NDJSON): 레이아웃 → 블록별 OCR 결과를 완료 순서대로 전송
+# -----------------------------------------------------------------------------
+def _ndjson(obj: dict) -> str:
+    return json.dumps(obj, ensure_ascii=False) + "\n"
+
+def _block_event(idx: int, b: dict) -> dict:
+    ocr = b.get("ocr") or {}
+    meta = ocr.get("meta") or {}
+    return {
+        "event": "block",
+        "index": idx,
+        "id": b.get("id"),
+        "type": b.get("type") or b.get("cls"),
+        "bbox": b.get("bbox") or b.get("box") or b.get("poly"),
+        "text": ocr.get("text"),
+        "engine": meta.get("engine"),
+        "score": meta.get("score"),
+        "table": b.get("table"),
+        "error": b.get("ocr_error") or b.get("warn"),
+    }
+
+async def _persist_layout(filename: str, layout: dict, overlay_name: str, png_path: str) -> int:
+    # 스트리밍 응답은 요청 의존성 종료 후에도 계속되므로 write-behind 저장기로 저장
+    return await db_writer.create(
+        filename=filename,
+        raw_text="(세그멘테이션 결과: 영역별 OCR 포함, 표 썸네일 생성)",
+        parsed={
+            "layout": layout,
+            "overlay_url": f"/captures/{overlay_name}",
+            "source_png": str(Path(png_path).resolve().relative_to(BASE_DIR)),
+        },
+        seg_json=layout,
+        vis_path=overlay_name,
+        score=0,
+        tier="layout",
+    )
+
+async def _stream_segment(filename: str, png_path: str):
+    loop = asyncio.get_running_loop()
+    t0 = time.perf_counter()
+    elapsed = lambda: round((time.perf_counter() - t0) * 1000.0, 1)
+    handle = None
+    submitted = []   # 공유 페이지를 참조하는 프로세스 풀 작업(해제 전에 모두 끝나야 함)
+    tasks = []
+
+    def _submit(fn, *args, **kw):
+        fut = pool.submit(fn, *args, **kw)
+        submitted.append(fut)
+        return asyncio.wrap_future(fut)
+
+    try:
+        # 0) 페이지는 한 번만 디코딩 → 레이아웃/오버레이/블록 OCR이 같은 배열 공유
+        bgr_full = await loop.run_in_executor(None, cv2.imread, png_path)
         if bgr_full is None:
             raise RuntimeError("이미지 로드 실패")
-        H, W = bgr_full.shape[:2]
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        stem = Path(file.filename).stem
+        bgr_full.flags.writeable = False
+        # 스크립트/방향은 페이지당 1회 감지(레이아웃과 동시에) → 모든 블록에 같은 lang/rotate
+        script_fut = (loop.run_in_executor(None, detect_page_script, bgr_full)
+                      if ocr_service.OCR_DETECT == "page" else None)
+        pool = page_buffer.page_pool()
+        if pool is not None:
+            # 프로세스 풀: 공유 메모리 핸들만 전달(복사/재디코딩 없음), 스트림 종료 시 해제
+            handle = await loop.run_in_executor(None, page_buffer.pages.put, bgr_full)
+
+        # 1) 레이아웃 → 즉시 전송
+        if handle is not None:
+            layout = await _submit(page_buffer.run_segment, handle)
+        else:
+            layout = await loop.run_in_executor(None, segment_layout_array, bgr_full)
+        if not isinstance(layout, dict) or "blocks" not in layout:
+            raise RuntimeError("세그멘테이션 결과 형식이 올바르지 않습니다. {'blocks': [...]} 형식 필요")
+        yield _ndjson({"event": "layout", "layout": layout, "elapsed_ms": elapsed()})
 
-        for idx, b in enumerate(layout["blocks"], start=1):
-            typ = (b.get("type") or b.get("cls") or "").lower()
-            bbox = b.get("bbox") or b.get("box") or b.get("poly")
-            if not bbox or len(bbox) < 4:
-                b["warn"] = "invalid_bbox"
-                continue
+        # 2) 오버레이(박스만 그리므로 OCR 결과와 무관)
+        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        stem = Path(filename).stem
+        overlay_name = f"{stem}_{ts}_overlay.png"
+        overlay_abs = BASE_DIR / "captures" / overlay_name
+        if handle is not None:
+            await _submit(page_buffer.run_overlay, handle, layout, str(overlay_abs))
+        else:
+            await loop.run_in_executor(
+                None, lambda: cv2.imwrite(str(overlay_abs), render_overlay(bgr_full.copy(), layout)))
+        yield _ndjson({"event": "overlay", "overlay_url": f"/captures/{overlay_name}", "elapsed_ms": elapsed()})
+
+        # 3) 블록별 OCR — 병렬 실행, 끝나는 순서대로 전송
+        if script_fut is not None:
+            script = await script_fut
+            ocr_kw = {"lang": script["lang"], "rotate": script["rotate"]}
+        else:
+            ocr_kw = {"lang": "auto"}   # OCR_DETECT=block: 블록마다 감지
 
-            # 좌표 클램핑
-            x1, y1, x2, y2 = map(int, bbox[:4])
-            x1, y1 = max(0, x1), max(0, y1)
-            x2, y2 = min(W - 1, x2), min(H - 1, y2)
+        H, W = bgr_full.shape[:2]
 
-            if typ == "text":
+        async def _run(idx: int, b: dict) -> int:
+            bbox = b.get("bbox") or b.get("box") or b.get("poly")
+            if (handle is not None and (b.get("type") or b.get("cls") or "").lower() == "text"
+                    and bbox and len(bbox) >= 4):
+                # 텍스트 OCR은 프로세스 풀에 바로 제출(동시성 = PAGE_WORKERS, 스레드가 .result()로 묶이지 않음)
                 try:
-                    b["ocr"] = ocr_text_region(png_path, [x1, y1, x2, y2])
+                    b["ocr"] = await _submit(page_buffer.run_region_ocr, handle, _clamp_bbox(bbox, W, H), **ocr_kw)
                 except Exception as ocr_e:
                     b["ocr_error"] = str(ocr_e)
+            else:
+                await loop.run_in_executor(_ocr_pool, _process_block, idx, b, bgr_full, bgr_full, stem, ts, ocr_kw)
+            return idx
+
+        tasks = [asyncio.ensure_future(_run(idx, b)) for idx, b in enumerate(layout["blocks"], start=1)]
+        for fut in asyncio.as_completed(tasks):
+            idx = await fut
+            ev = _block_event(idx, layout["blocks"][idx - 1])
+            ev["elapsed_ms"] = elapsed()
+            yield _ndjson(ev)
+
+        # 4) DB 저장
+        rec_id = await _persist_layout(filename, layout, overlay_name, png_path)
+        yield _ndjson({"event": "done", "record_id": rec_id, "url": f"/documents/{rec_id}",
+                       "layout": layout, "elapsed_ms": elapsed()})
 
-            elif typ == "table":
-                crop = bgr_full[y1:y2, x1:x2]
-                if crop.size:
-                    tbl_name = f"{stem}_{ts}_t{idx}.png"
-                    tbl_abs = BASE_DIR / "captures" / "tables" / tbl_name
-                    cv2.imwrite(str(tbl_abs), crop)
-                    b.setdefault("table", {})
-                    b["table"]["image_url"] = f"/captures/tables/{tbl_name}"
-                    if "content" in b and b["content"] is not None:
-                        b["table"]["raw"] = b["content"]
-
-        # 4) 오버레이 이미지 생성 (절대경로 저장)
-        overlay_name = f"{stem}_{ts}_overlay.png"
-        overlay_abs = BASE_DIR / "captures" / overlay_name
-        save_overlay(png_path, layout, str(overlay_abs))
-        overlay_url = f"/captures/{overlay_name}"
+    except Exception as e:
+        yield _ndjson({"event": "error", "message": f"{type(e).__name__}: {e}", "elapsed_ms": elapsed()})
+    finally:
+        # 클라이언트 연결 끊김/오류: 남은 작업을 취소하고, 이미 실행 중인 풀 작업이 끝난 뒤에 공유 페이지 해제
+        for t in tasks:
+            t.cancel()
+        for fut in submitted:
+            fut.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if submitted:
+            await asyncio.to_thread(wait_futures, submitted)
+        if handle is not None:
+            page_buffer.pages.release(handle)
+
+@app.post("/upload_and_segment/stream")
+async def upload_and_segment_stream(file: UploadFile = File(...)):
+    raw = await file.read()
+    if not raw:
+        raise HTTPException(400, "빈 파일입니다.")
+    png_path = save_upload_to_png(file, raw)
+    return StreamingResponse(
+        _stream_segment(file.filename, png_path),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
 
-        # 5) DB 저장 — create_full_record 사용 (파라미터명 주의: ocr_text)
-        parsed_payload = {
-            "layout": layout,
-            "overlay_url": overlay_url,
-            "source_png": str(Path(png_path).resolve().relative_to(BASE_DIR)), # resolve()를 추가하면 png_path가 상대경로이든 절대경로이든 BASE_DIR 기준의 절대경로로 변환된 뒤 relative_to() 작동
+# 스트리밍 상세 화면(업로드 후 결과가 도착하는 대로 채움) — /documents/{record_id} 보다 먼저 등록
+@app.get("/documents/live", response_class=HTMLResponse)
+async def document_live(request: Request):
+    return templates.TemplateResponse(
+        "result_detail.html",
+        {
+            "request": request,
+            "record_id": None,
+            "filename": "",
+            "overlay_url": "",
+            "doc_json": "{}",
+            "parsed": {},
+            "streaming": True,
         }
-        rec = create_full_record(
-            db,
-            filename=file.filename,
-            ocr_text="(세그멘테이션 결과: 영역별 OCR 포함, 표 썸네일 생성)",
-            parsed=parsed_payload,   # UI 친화 메타
-            seg_json=layout,         # 모델 친화 원본 구조
-            vis_path=overlay_name,   # 파일명만 저장
-            score=0,
-            tier="layout",
-        )
-
-        # ✅ 바로 상세 페이지로 이동
-        return RedirectResponse(url=f"/documents/{rec.id}", status_code=303)
-
-    except Exception as e:
-        return templates.TemplateResponse(
-            "index.html",
-            {"request": request, "text": f"❌ {type(e).__name__}: {e}"}
-        )
+    )
 
 # -----------------------------------------------------------------------------
 # 저장된 문서 상세(HTML)
 # -----------------------------------------------------------------------------
+async def _fetch_record(record_id: int) -> OCRRecord | None:
+    """비동기 드라이버가 있으면 AsyncSession, 없으면 동기 세션을 스레드에서(db_writer와 같은 대체)"""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            return await aget_record(db, record_id)
+
+    def _sync():
+        db = SessionLocal()
+        try:
+            return get_record(db, record_id)
+        finally:
+            db.close()
+    return await asyncio.to_thread(_sync)
+
+def _record_job_view(record_id: int) -> dict | None:
+    """큐 placeholder 레코드의 작업 상태(템플릿용)"""
+    db = SessionLocal()
+    try:
+        job = get_record_job(db, record_id)
+        if job is None:
+            return None
+        return {"id": job.id, "status": job_state(job), "attempts": job.attempts,
+                "max_attempts": job.max_attempts, "error": job.error}
+    finally:
+        db.close()
+
 @app.get("/documents/{record_id}", response_class=HTMLResponse)
-async def document_detail(request: Request, record_id: int, db: Session = Depends(get_db)):
-    rec = get_record(db, record_id)
+async def document_detail(request: Request, record_id: int):
+    rec = await _fetch_record(record_id)
     if not rec:
         raise HTTPException(404, "문서를 찾을 수 없습니다.")
 
     parsed_obj = _as_obj(rec.parsed)
+    queued = rec.tier == "queued"
+    job = await asyncio.to_thread(_record_job_view, record_id) if queued else None
 
     # vis_path 우선 → parsed.overlay_url → 과거 규칙 추정
     overlay_url = None
@@ -254,7 +490,9 @@ async def document_detail(request: Request, record_id: int, db: Session = Depend
             "filename": rec.filename,
             "overlay_url": overlay_url,
             "doc_json": json.dumps(parsed_obj, ensure_ascii=False, indent=2),
-            "parsed": parsed_obj
+            "parsed": parsed_obj,
+            "queued": queued,
+            "job": job,
         }
     )
 
@@ -262,8 +500,8 @@ async def document_detail(request: Request, record_id: int, db: Session = Depend
 # 레이아웃 JSON API
 # -----------------------------------------------------------------------------
 @app.get("/api/documents/{record_id}/layout")
-async def get_layout_json(record_id: int, db: Session = Depends(get_db)):
-    rec = get_record(db, record_id)
+async def get_layout_json(record_id: int):
+    rec = await _fetch_record(record_id)
     if not rec:
         raise HTTPException(404, "문서를 찾을 수 없습니다.")
     # seg_json 우선, 없으면 parsed.layout
@@ -273,6 +511,170 @@ async def get_layout_json(record_id: int, db: Session = Depends(get_db)):
     parsed_obj = _as_obj(rec.parsed)
     return parsed_obj.get("layout", parsed_obj)
 
+# -----------------------------------------------------------------------------
+# 단어 박스 API: 클릭 선택(점/사각형 질의) + 검색 하이라이트 (좌표 = 원본 페이지 px)
+# -----------------------------------------------------------------------------
+@lru_cache(maxsize=64)
+def _load_geometry(path: str, mtime_ns: int) -> WordGeometry:
+    # mtime이 바뀌면(재처리) 새로 로드
+    return WordGeometry.load(path)
+
+async def _record_geometry(record_id: int) -> WordGeometry:
+    rec = await _fetch_record(record_id)
+    if not rec:
+        raise HTTPException(404, "문서를 찾을 수 없습니다.")
+    rel = _as_obj(rec.parsed).get("geometry")
+    path = BASE_DIR / rel if rel else None
+    if not path or not path.exists():
+        raise HTTPException(404, "단어 좌표가 없습니다. (파이프라인 재처리 필요)")
+    return _load_geometry(str(path), path.stat().st_mtime_ns)
+
+@app.get("/api/documents/{record_id}/words")
+async def document_words(
+    record_id: int,
+    x: float | None = None, y: float | None = None, tol: float = 3,
+    x1: float | None = None, y1: float | None = None,
+    x2: float | None = None, y2: float | None = None,
+):
+    geo = await _record_geometry(record_id)
+    if x is not None and y is not None:
+        idxs = geo.query_point(x, y, tol=tol)
+    elif None not in (x1, y1, x2, y2):
+        idxs = geo.query_rect(x1, y1, x2, y2)
+    else:
+        raise HTTPException(400, "x,y 또는 x1,y1,x2,y2 가 필요합니다.")
+    words = geo.items(idxs)
+    return {"count": len(words), "text": " ".join(w["text"] for w in words), "words": words}
+
+@app.get("/api/documents/{record_id}/search")
+async def document_search(record_id: int, q: str, limit: int = 200):
+    geo = await _record_geometry(record_id)
+    hits = geo.search(q, limit=limit)
+    return {
+        "query": q,
+        "count": len(hits),
+        "hits": [
+            {
+                "bbox": [min(geo.x1[i] for i in h), min(geo.y1[i] for i in h),
+                         max(geo.x2[i] for i in h), max(geo.y2[i] for i in h)],
+                "text": " ".join(geo.text(i) for i in h),
+                "block": geo.block[h[0]],
+                "words": h,
+            }
+            for h in hits
+        ],
+    }
+
+# -----------------------------------------------------------------------------
+# 딥줌 타일: 페이지 원본(parsed.source_png) → 지연 생성 + 디스크 캐시, 박스는 클라이언트 벡터 렌더
+# -----------------------------------------------------------------------------
+# record_id → 최근 피라미드 key(타일 요청마다 DB 조회하지 않도록, 다른 문서의 key로는 열리지 않게)
+_record_tile_keys: "OrderedDict[int, str]" = OrderedDict()
+
+async def _record_pyramid(record_id: int) -> tiles.TilePyramid:
+    rec = await _fetch_record(record_id)
+    if not rec:
+        raise HTTPException(404, "문서를 찾을 수 없습니다.")
+    rel = _as_obj(rec.parsed).get("source_png")
+    path = BASE_DIR / rel if rel else None
+    if not path or not path.exists():
+        raise HTTPException(404, "페이지 원본 이미지가 없습니다.")
+    pyr = await asyncio.to_thread(tiles.get_pyramid, path)
+    _record_tile_keys[record_id] = pyr.key
+    _record_tile_keys.move_to_end(record_id)
+    while len(_record_tile_keys) > 1024:
+        _record_tile_keys.popitem(last=False)
+    return pyr
+
+@app.get("/api/documents/{record_id}/tiles")
+async def document_tiles_info(record_id: int):
+    pyr = await _record_pyramid(record_id)
+    info = pyr.info()
+    info["url"] = f"/api/documents/{record_id}/tiles/{pyr.key}/{{z}}/{{x}}/{{y}}"
+    return info
+
+@app.get("/api/documents/{record_id}/tiles/{key}/{z}/{x}/{y}")
+async def document_tile(record_id: int, key: str, z: int, x: int, y: int):
+    # key는 원본 버전 → 같은 URL은 내용이 바뀌지 않으므로 장기 캐시
+    pyr = tiles.pyramid_by_key(key) if _record_tile_keys.get(record_id) == key else None
+    if pyr is None:
+        pyr = await _record_pyramid(record_id)
+    if pyr.key != key:
+        raise HTTPException(404, "원본이 변경되었습니다. 타일 정보를 다시 요청하세요.")
+    try:
+        path = await asyncio.to_thread(pyr.tile_path, z, x, y)
+    except ValueError as e:
+        raise HTTPException(404, str(e))
+    return FileResponse(str(path), media_type=pyr.media_type,
+                        headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+# -----------------------------------------------------------------------------
+# 대량 내보내기: 서버 측 커서 → NDJSON/CSV/Parquet(+gzip/zstd) 스트리밍, 메모리 일정
+# -----------------------------------------------------------------------------
+@app.get("/api/export")
+def export_records(
+    format: str = "ndjson",
+    compress: str = "none",
+    since: str | None = None,
+    until: str | None = None,
+    tier: str | None = None,
+    filename: str | None = None,
+    after_id: int | None = None,
+):
+    try:
+        exporter.check_options(format, compress)
+        filters = dict(since=since, until=until, tier=tier, filename=filename, after_id=after_id)
+        exporter.build_query(**filters)   # 날짜 형식 검증
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    name = exporter.export_filename(format, compress)
+    media = exporter.MEDIA_TYPES[format]
+    if format != "parquet" and compress != "none":
+        media = "application/gzip" if compress == "gzip" else "application/zstd"
+    # 동기 제너레이터 → 스레드풀에서 순회(이벤트 루프 비차단)
+    return StreamingResponse(
+        exporter.export_stream(format, compress, **filters),
+        media_type=media,
+        headers={"Content-Disposition": f'attachment; filename="{name}"', "Cache-Control": "no-store"},
+    )
+
+# -----------------------------------------------------------------------------
+# 부분 재처리: 코드/파라미터가 바뀐 스테이지만 재계산(백그라운드)
+# -----------------------------------------------------------------------------
+@app.post("/api/reprocess")
+async def reprocess_api(
+    background: BackgroundTasks,
+    ids: list[int] | None = None,
+    force: str | None = None,
+    dry_run: bool = False,
+    workers: int = 2,
+):
+    if force and force not in pipeline.STAGE_NAMES:
+        raise HTTPException(400, f"알 수 없는 스테이지: {force}")
+    if dry_run:
+        return {"plan": await asyncio.to_thread(pipeline.reprocess, ids, force, 1, True)}
+    docs = await asyncio.to_thread(pipeline.iter_documents, ids)
+    background.add_task(pipeline.reprocess, ids, force, workers)
+    return {"queued": len(docs), "force": force}
+
+# 워커 큐 작업 상태(PIPELINE_MODE=queue)
+@app.get("/api/jobs/{job_id}")
+def job_status(job_id: int, db: Session = Depends(get_db)):
+    job = get_job(db, job_id)
+    if not job:
+        raise HTTPException(404, "작업을 찾을 수 없습니다.")
+    return {
+        "id": job.id,
+        "record_id": job.record_id,
+        "status": job_state(job),
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "lease_owner": job.lease_owner,
+        "lease_expires_at": job.lease_expires_at.isoformat() if job.lease_expires_at else None,
+        "heartbeat_at": job.heartbeat_at.isoformat() if job.heartbeat_at else None,
+        "error": job.error,
+    }
+
 # -----------------------------------------------------------------------------
 # 하위호환 라우트
 # -----------------------------------------------------------------------------
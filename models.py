@@ -1,7 +1,7 @@
 # models.py
 from datetime import datetime
 from sqlalchemy import Column, Integer, String, Text, JSON, DateTime, func
-from sqlalchemy import declarative_base
+from sqlalchemy.orm import declarative_base
 #from sqlalchemy.orm import Mapped, mapped_column, declarative_base
 from db import Base
 
@@ -39,4 +39,22 @@ class OCRRecord(Base):
     overlay_path = Column(Text)
     tables_dir = Column(Text)
     ocr_json_path = Column(Text)
-    
\ No newline at end of file
+    
+
+class OCRJob(Base):
+    """워커 큐: 대기 문서(artifacts/<doc_key>) 처리 작업 — 임대(lease) + 하트비트로 선점"""
+    __tablename__ = "ocr_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    record_id = Column(Integer, index=True, nullable=True)   # 결과를 채울 OCRRecord
+    doc_dir = Column(String(512), nullable=False)            # 파이프라인 문서 디렉터리
+    force = Column(String(32), nullable=True)                # 이 스테이지부터 강제 재계산(선택)
+    status = Column(String(16), index=True, default="pending")  # pending/running/done/failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    lease_owner = Column(String(128), nullable=True)
+    lease_expires_at = Column(DateTime, index=True, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,341 @@
+# services/export.py — OCRRecord 대량 내보내기(NDJSON / CSV / Parquet) 스트리밍
+"""
+서버 측 커서(yield_per → stream_results)로 레코드를 BATCH 단위로만 읽어 바로 인코딩 → 메모리 일정.
+
+형식)
+  ndjson  : 레코드 1줄. seg_json은 저장된 문자열을 그대로 끼워 넣음(파싱/재직렬화 없음)
+  csv     : id, filename, created_at, tier, score, text (블록 OCR 텍스트 결합, 없으면 raw_text)
+  parquet : 블록 1행(평탄화) — record_id, block, type, x1..y2, text, engine, ocr_score ...
+            (pyarrow 필요, 압축은 Parquet 내부 코덱으로 적용)
+압축) gzip(zlib, 표준) / zstd(zstandard 설치 시) — 인코딩과 동시에 스트림 압축
+
+CLI)
+    python -m services.export --format ndjson --compress gzip -o out.ndjson.gz
+    python -m services.export --format parquet --since 2025-01-01 --tier layout -o out.parquet
+    python -m services.export --format csv --filename invoice > out.csv
+"""
+from __future__ import annotations
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse, csv, io, json, zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
+
+from sqlalchemy import select
+
+from db import engine
+from models import OCRRecord
+
+_HAS_ARROW = False
+_HAS_ZSTD = False
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _HAS_ARROW = True
+except Exception:
+    pa = pq = None
+
+try:
+    import zstandard
+    _HAS_ZSTD = True
+except Exception:
+    zstandard = None
+
+FORMATS = ("ndjson", "csv", "parquet")
+COMPRESSIONS = ("none", "gzip", "zstd")
+EXPORT_BATCH = int(os.getenv("EXPORT_BATCH", "500"))     # 커서에서 한 번에 가져올 행 수
+_FLUSH_BYTES = 256 * 1024                                 # 출력 청크 크기
+
+_COLUMNS = (OCRRecord.id, OCRRecord.filename, OCRRecord.created_at, OCRRecord.tier,
+            OCRRecord.score, OCRRecord.raw_text, OCRRecord.seg_json)
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8",
+               "parquet": "application/vnd.apache.parquet"}
+EXTENSIONS = {"ndjson": ".ndjson", "csv": ".csv", "parquet": ".parquet"}
+
+
+# ================= 조회(서버 측 커서) =================
+def _parse_when(value: str | datetime | None) -> datetime | None:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def build_query(since=None, until=None, tier: str | None = None, filename: str | None = None,
+                after_id: int | None = None):
+    """
+    필터 → SELECT. since/until: ISO 날짜/시각(until은 미포함), tier: 쉼표 구분 복수 가능,
+    filename: 부분 일치(* 와일드카드 허용), after_id: 이 id 다음부터(이어받기)
+    """
+    stmt = select(*_COLUMNS).order_by(OCRRecord.id)
+    since, until = _parse_when(since), _parse_when(until)
+    if since:
+        stmt = stmt.where(OCRRecord.created_at >= since)
+    if until:
+        stmt = stmt.where(OCRRecord.created_at < until)
+    if tier:
+        tiers = [t.strip() for t in tier.split(",") if t.strip()]
+        stmt = stmt.where(OCRRecord.tier.in_(tiers))
+    if filename:
+        pattern = filename.replace("*", "%") if "*" in filename else f"%{filename}%"
+        stmt = stmt.where(OCRRecord.filename.like(pattern))
+    if after_id:
+        stmt = stmt.where(OCRRecord.id > after_id)
+    return stmt
+
+
+def iter_rows(batch: int = EXPORT_BATCH, **filters) -> Iterator[Any]:
+    """레코드 행 스트림(MySQL: 서버 측 커서 SSCursor, SQLite: 순차 fetch)"""
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=batch).execute(build_query(**filters))
+        for row in result:
+            yield row
+
+
+# ================= 행 → 필드 =================
+def _blocks(seg_json: str | None) -> List[Dict[str, Any]]:
+    if not seg_json:
+        return []
+    try:
+        obj = json.loads(seg_json)
+    except ValueError:
+        return []
+    blocks = obj.get("blocks") if isinstance(obj, dict) else obj
+    return blocks if isinstance(blocks, list) else []
+
+
+def _block_text(b: Dict[str, Any]) -> str:
+    ocr = b.get("ocr") or {}
+    return ocr.get("text") or ""
+
+
+def _iso(dt) -> str | None:
+    return dt.isoformat() if dt else None
+
+
+# ================= 인코더 =================
+def _ndjson_chunks(rows: Iterable[Any]) -> Iterator[bytes]:
+    buf: List[str] = []
+    size = 0
+    for r in rows:
+        head = json.dumps(
+            {"id": r.id, "filename": r.filename, "created_at": _iso(r.created_at),
+             "tier": r.tier, "score": r.score, "raw_text": r.raw_text},
+            ensure_ascii=False,
+        )
+        seg = (r.seg_json or "").strip()
+        err = None
+        if not seg:
+            seg = "null"
+        else:
+            # 유효성만 확인하고 저장된 문자열을 그대로 사용(재직렬화 없음).
+            # 유효한 JSON의 개행은 문자열 밖 공백뿐이라 공백으로 바꿔도 값이 같음 → 한 줄 유지
+            try:
+                json.loads(seg)
+                if "\n" in seg or "\r" in seg:
+                    seg = seg.replace("\r", " ").replace("\n", " ")
+            except ValueError as e:
+                seg, err = "null", f"seg_json 파싱 실패: {e}"
+        if err:
+            line = f'{head[:-1]}, "layout": null, "layout_error": {json.dumps(err, ensure_ascii=False)}}}\n'
+        else:
+            line = f'{head[:-1]}, "layout": {seg}}}\n'
+        buf.append(line)
+        size += len(line)
+        if size >= _FLUSH_BYTES:
+            yield "".join(buf).encode("utf-8")
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
+
+
+def _csv_chunks(rows: Iterable[Any]) -> Iterator[bytes]:
+    out = io.StringIO()
+    w = csv.writer(out)
+    w.writerow(["id", "filename", "created_at", "tier", "score", "text"])
+    for r in rows:
+        texts = [t for t in (_block_text(b) for b in _blocks(r.seg_json)) if t]
+        w.writerow([r.id, r.filename, _iso(r.created_at), r.tier, r.score,
+                    "\n\n".join(texts) if texts else (r.raw_text or "")])
+        if out.tell() >= _FLUSH_BYTES:
+            yield out.getvalue().encode("utf-8")
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue().encode("utf-8")
+
+
+class _StreamSink(io.RawIOBase):
+    """쓴 바이트를 모아 두었다가 drain()으로 넘기는 출력(tell은 누적 위치 → Parquet 오프셋 유지)"""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _parquet_schema():
+    return pa.schema([
+        ("record_id", pa.int64()), ("filename", pa.string()), ("created_at", pa.timestamp("us")),
+        ("tier", pa.string()), ("record_score", pa.int32()), ("block", pa.int32()), ("type", pa.string()),
+        ("x1", pa.int32()), ("y1", pa.int32()), ("x2", pa.int32()), ("y2", pa.int32()),
+        ("text", pa.string()), ("engine", pa.string()), ("ocr_score", pa.float32()), ("lang", pa.string()),
+    ])
+
+
+def _parquet_chunks(rows: Iterable[Any], compression: str = "zstd", row_group: int = 20000) -> Iterator[bytes]:
+    """블록 단위로 평탄화해 row group마다 기록 → 기록된 바이트를 즉시 내보냄"""
+    if not _HAS_ARROW:
+        raise RuntimeError("Parquet 내보내기에는 pyarrow가 필요합니다.")
+    schema = _parquet_schema()
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(sink, schema, compression=compression)
+    cols: Dict[str, list] = {name: [] for name in schema.names}
+
+    def flush():
+        writer.write_table(pa.table(cols, schema=schema))
+        for v in cols.values():
+            v.clear()
+        return sink.drain()
+
+    try:
+        for r in rows:
+            for idx, b in enumerate(_blocks(r.seg_json), start=1):
+                bbox = (b.get("bbox") or b.get("box") or [None] * 4)[:4]
+                if len(bbox) < 4:
+                    bbox = [None] * 4
+                meta = (b.get("ocr") or {}).get("meta") or {}
+                score = meta.get("score")
+                for k, v in (("record_id", r.id), ("filename", r.filename), ("created_at", r.created_at),
+                             ("tier", r.tier), ("record_score", r.score), ("block", idx),
+                             ("type", b.get("type") or b.get("cls")),
+                             ("x1", bbox[0]), ("y1", bbox[1]), ("x2", bbox[2]), ("y2", bbox[3]),
+                             ("text", _block_text(b) or None), ("engine", meta.get("engine")),
+                             ("ocr_score", float(score) if isinstance(score, (int, float)) else None),
+                             ("lang", meta.get("lang"))):
+                    cols[k].append(int(v) if k in ("x1", "y1", "x2", "y2") and v is not None else v)
+            if len(cols["record_id"]) >= row_group:
+                yield flush()
+        if cols["record_id"]:
+            yield flush()
+    finally:
+        writer.close()   # footer
+    yield sink.drain()
+
+
+def _compress(chunks: Iterable[bytes], method: str) -> Iterator[bytes]:
+    if method in (None, "", "none"):
+        yield from chunks
+        return
+    if method == "gzip":
+        co = zlib.compressobj(6, zlib.DEFLATED, 31)   # wbits=31 → gzip 헤더
+        for c in chunks:
+            out = co.compress(c)
+            if out:
+                yield out
+        yield co.flush()
+        return
+    if method == "zstd":
+        if not _HAS_ZSTD:
+            raise RuntimeError("zstd 압축에는 zstandard가 필요합니다.")
+        co = zstandard.ZstdCompressor(level=3).compressobj()
+        for c in chunks:
+            out = co.compress(c)
+            if out:
+                yield out
+        yield co.flush()
+        return
+    raise ValueError(f"알 수 없는 압축: {method}")
+
+
+def check_options(fmt: str, compress: str = "none") -> None:
+    """형식/압축 조합 검증(의존성 포함). 문제가 있으면 ValueError"""
+    if fmt not in FORMATS:
+        raise ValueError(f"지원 형식: {', '.join(FORMATS)}")
+    if compress not in COMPRESSIONS:
+        raise ValueError(f"지원 압축: {', '.join(COMPRESSIONS)}")
+    if fmt == "parquet" and not _HAS_ARROW:
+        raise ValueError("Parquet 내보내기에는 pyarrow가 필요합니다.")
+    if compress == "zstd" and not _HAS_ZSTD and fmt != "parquet":
+        raise ValueError("zstd 압축에는 zstandard가 필요합니다.")
+
+
+def export_filename(fmt: str, compress: str = "none") -> str:
+    name = f"ocr_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}{EXTENSIONS[fmt]}"
+    if fmt != "parquet" and compress == "gzip":
+        name += ".gz"
+    elif fmt != "parquet" and compress == "zstd":
+        name += ".zst"
+    return name
+
+
+def export_stream(fmt: str = "ndjson", compress: str = "none", batch: int = EXPORT_BATCH,
+                  **filters) -> Iterator[bytes]:
+    """필터된 레코드를 지정 형식/압축 바이트 청크로 스트리밍"""
+    check_options(fmt, compress)
+    rows = iter_rows(batch=batch, **filters)
+    if fmt == "parquet":
+        # Parquet은 페이지 단위 내부 압축(외부 스트림 압축 대신)
+        codec = "snappy" if compress == "none" else compress
+        yield from _parquet_chunks(rows, compression=codec)
+        return
+    chunks = _ndjson_chunks(rows) if fmt == "ndjson" else _csv_chunks(rows)
+    yield from _compress(chunks, compress)
+
+
+# ================= CLI =================
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m services.export")
+    ap.add_argument("--format", choices=FORMATS, default="ndjson")
+    ap.add_argument("--compress", choices=COMPRESSIONS, default="none")
+    ap.add_argument("--since", help="created_at 하한(ISO, 포함)")
+    ap.add_argument("--until", help="created_at 상한(ISO, 미포함)")
+    ap.add_argument("--tier", help="tier (쉼표로 복수)")
+    ap.add_argument("--filename", help="파일명 부분 일치(* 와일드카드)")
+    ap.add_argument("--after-id", type=int, help="이 id 다음부터(이어받기)")
+    ap.add_argument("--batch", type=int, default=EXPORT_BATCH)
+    ap.add_argument("-o", "--out", default="-", help="출력 파일(기본: stdout)")
+    args = ap.parse_args(argv)
+
+    try:
+        check_options(args.format, args.compress)
+    except ValueError as e:
+        ap.error(str(e))
+
+    stream = export_stream(args.format, args.compress, batch=args.batch, since=args.since,
+                           until=args.until, tier=args.tier, filename=args.filename,
+                           after_id=args.after_id)
+    out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+    total = 0
+    try:
+        for chunk in stream:
+            out.write(chunk)
+            total += len(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"내보내기 완료: {total / 1024:.1f} KiB", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
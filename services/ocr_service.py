@@ -8,13 +8,14 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from fastapi import HTTPException, UploadFile
 from PIL import Image, ImageEnhance, ImageFilter, ImageOps
 from pillow_heif import register_heif_opener
-from pdf2image import convert_from_path
-import pytesseract, io, uuid, tempfile, re
+from pdf2image import convert_from_path, convert_from_bytes
+import pytesseract, io, uuid, tempfile, re, threading
+from importlib.util import find_spec
 from statistics import median
 from typing import Tuple, Dict, Any
 
 # 후처리
-from utils.text_cleaner import clean_ocr_text
+from utils.text_cleaner import normalize_ocr_text
 
 # ================= 기본 설정 =================
 # (Ubuntu 기본 경로. Mac 등 환경에 맞게 조정 가능)
@@ -22,13 +23,17 @@ pytesseract.pytesseract.tesseract_cmd = "/usr/bin/tesseract"
 register_heif_opener()
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+IMG_MAX_SHORT = 1600        # 업로드 이미지 짧은 변 상한(px)
+PREVIEW_MAX_SIDE = 1000     # 미리보기 긴 변 상한(px)
+PREVIEW_PDF_DPI = 60        # 미리보기 PDF 렌더 DPI
 
 # ================= OCR 엔진 초기화 =================
+# PaddleOCR/EasyOCR는 설치 여부만 확인하고 모델은 첫 사용 시 생성
+# (큐 모드 웹 서버·ONNX 백엔드 프로세스가 쓰지 않는 스택을 import/로딩하지 않도록, 필요하면 warmup())
 _HAS_CV2 = False
-_HAS_PADDLE = False
-_HAS_EASYOCR = False
-_paddle = None
-_easyocr = None
+_HAS_PADDLE = find_spec("paddleocr") is not None
+_HAS_EASYOCR = find_spec("easyocr") is not None
+_engine_lock = threading.Lock()
 
 try:
     import cv2, numpy as np
@@ -36,21 +41,87 @@ try:
 except Exception:
     pass
 
-try:
-    from paddleocr import PaddleOCR
-    _paddle = PaddleOCR(lang='korean', use_angle_cls=True, show_log=False)
-    _HAS_PADDLE = True
-except Exception:
-    _paddle = None
-    _HAS_PADDLE = False
+# ONNX Runtime 백엔드(PaddleOCR 모델 export본, 첫 호출 시 지연 로딩)
+#   PADDLE_BACKEND=onnx 로 ocr_best의 paddle 슬롯을 대체
+PADDLE_BACKEND = os.getenv("PADDLE_BACKEND", "paddle")
+# OCR_ENSEMBLE=line: Tesseract 줄 단위 결과 중 저신뢰 줄만 무거운 엔진으로 재인식
+OCR_ENSEMBLE = os.getenv("OCR_ENSEMBLE", "page")
+LINE_CONF_THRESHOLD = float(os.getenv("LINE_CONF_THRESHOLD", "70"))
+# 영역 OCR 언어/방향 감지 단위: page(페이지당 1회, 기본) | block(블록마다 — OSD+프로브가 블록 수만큼 돌아 느림)
+OCR_DETECT = os.getenv("OCR_DETECT", "page").lower()
+ONNX_MODEL_DIR = os.getenv("ONNX_OCR_DIR", "models/onnx")
+_HAS_ONNX = False
+_onnx_by_lang: Dict[str, Any] = {}
 
 try:
-    import easyocr
-    _easyocr = easyocr.Reader(['ko', 'en'], gpu=False)  # CPU/M1 안전
-    _HAS_EASYOCR = True
+    from services import onnx_ocr
+    _HAS_ONNX = True
 except Exception:
-    _easyocr = None
-    _HAS_EASYOCR = False
+    onnx_ocr = None
+    _HAS_ONNX = False
+
+# 언어별 모델(첫 호출 시 지연 로딩, 실패하면 None 캐시)
+_paddle_by_lang: Dict[str, Any] = {}
+_easyocr_by_lang: Dict[Tuple[str, ...], Any] = {}
+_PADDLE_LANG = {"kor+eng": "korean", "kor": "korean", "eng": "en"}
+_EASYOCR_LANG = {"kor+eng": ("ko", "en"), "kor": ("ko", "en"), "eng": ("en",)}
+
+
+def _get_paddle(lang: str = "kor+eng"):
+    name = _PADDLE_LANG.get(lang, "korean")
+    if not _HAS_PADDLE:
+        return None
+    with _engine_lock:
+        if name not in _paddle_by_lang:
+            try:
+                from paddleocr import PaddleOCR
+                _paddle_by_lang[name] = PaddleOCR(lang=name, use_angle_cls=True, show_log=False)
+            except Exception as e:
+                print(f"[PaddleOCR] {name} 모델 로드 실패: {e}")
+                _paddle_by_lang[name] = None
+        return _paddle_by_lang[name]
+
+
+def _get_onnx(lang: str = "kor+eng"):
+    """<ONNX_OCR_DIR>/<korean|en>/ 우선, 없으면 <ONNX_OCR_DIR>/ 모델 사용"""
+    name = _PADDLE_LANG.get(lang, "korean")
+    with _engine_lock:
+        if name not in _onnx_by_lang:
+            sub = os.path.join(ONNX_MODEL_DIR, name)
+            model_dir = sub if os.path.isdir(sub) else ONNX_MODEL_DIR
+            try:
+                _onnx_by_lang[name] = onnx_ocr.load_from_env(model_dir)
+            except Exception as e:
+                print(f"[ONNX] {model_dir} 모델 로드 실패: {e}")
+                _onnx_by_lang[name] = None
+        return _onnx_by_lang[name]
+
+
+def _get_easyocr(lang: str = "kor+eng"):
+    langs = _EASYOCR_LANG.get(lang, ("ko", "en"))
+    if not _HAS_EASYOCR:
+        return None
+    with _engine_lock:
+        if langs not in _easyocr_by_lang:
+            try:
+                import easyocr
+                _easyocr_by_lang[langs] = easyocr.Reader(list(langs), gpu=False)  # CPU/M1 안전
+            except Exception as e:
+                print(f"[EasyOCR] {langs} 모델 로드 실패: {e}")
+                _easyocr_by_lang[langs] = None
+        return _easyocr_by_lang[langs]
+
+
+def warmup(use_paddle: bool = True, use_easyocr: bool = True, paddle_backend: str | None = None) -> None:
+    """기본(ko+en) 모델을 미리 생성(서버 시작 시 첫 요청 지연 방지)"""
+    if use_paddle:
+        if (paddle_backend or PADDLE_BACKEND) == "onnx":
+            if _HAS_ONNX:
+                _get_onnx()
+        else:
+            _get_paddle()
+    if use_easyocr:
+        _get_easyocr()
 
 
 # ================= 파일 저장 =================
@@ -62,12 +133,10 @@ def save_upload_to_png(file: UploadFile, raw: bytes, pdf_dpi: int = 200) -> str:
     """
     if not raw:
         raise HTTPException(400, "빈 파일입니다.")
-    ctype = (file.content_type or "").lower()
-    fname = (file.filename or "").lower()
     out_png = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}.png")
 
     try:
-        if ctype == "application/pdf" or fname.endswith(".pdf"):
+        if _is_pdf(file):
             with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tf:
                 tf.write(raw)
                 tmp_pdf = tf.name
@@ -82,11 +151,10 @@ def save_upload_to_png(file: UploadFile, raw: bytes, pdf_dpi: int = 200) -> str:
             if img.mode not in ("RGB", "L"):
                 img = img.convert("RGB")
 
-            MAX_SHORT = 1600
             w, h = img.size
             short = min(w, h)
-            if short > MAX_SHORT:
-                scale = MAX_SHORT / short
+            if short > IMG_MAX_SHORT:
+                scale = IMG_MAX_SHORT / short
                 img = img.resize((int(w*scale), int(h*scale)), Image.LANCZOS)
 
             img.save(out_png, "PNG")
@@ -97,6 +165,64 @@ def save_upload_to_png(file: UploadFile, raw: bytes, pdf_dpi: int = 200) -> str:
     return out_png
 
 
+def _is_pdf(file: UploadFile) -> bool:
+    ctype = (file.content_type or "").lower()
+    fname = (file.filename or "").lower()
+    return ctype == "application/pdf" or fname.endswith(".pdf")
+
+
+def load_upload_preview(
+    file: UploadFile,
+    raw: bytes,
+    max_side: int = PREVIEW_MAX_SIDE,
+    pdf_dpi: int = 200,
+    preview_dpi: int = PREVIEW_PDF_DPI,
+) -> Tuple["np.ndarray", float, float]:
+    """
+    업로드를 저해상도 BGR 배열로 바로 디코딩(디스크 저장 없음).
+    - JPEG: draft 모드로 1/2~1/8 축소 디코딩
+    - PDF: 첫 페이지를 preview_dpi로 렌더
+    return: (bgr, sx, sy) — 미리보기 좌표 × (sx, sy) = save_upload_to_png 결과 좌표
+    """
+    if not raw:
+        raise HTTPException(400, "빈 파일입니다.")
+    if not _HAS_CV2:
+        raise HTTPException(500, "cv2 미설치로 미리보기 불가")
+
+    try:
+        if _is_pdf(file):
+            pages = convert_from_bytes(raw, dpi=preview_dpi, first_page=1, last_page=1)
+            if not pages:
+                raise HTTPException(400, "PDF 페이지를 읽지 못했습니다.")
+            img = pages[0]
+            full_w = round(img.size[0] * pdf_dpi / preview_dpi)
+            full_h = round(img.size[1] * pdf_dpi / preview_dpi)
+        else:
+            img = Image.open(io.BytesIO(raw))
+            w, h = img.size
+            # EXIF 회전(5~8)이면 가로/세로 교환
+            if img.getexif().get(0x0112) in (5, 6, 7, 8):
+                w, h = h, w
+            short = min(w, h)
+            scale = IMG_MAX_SHORT / short if short > IMG_MAX_SHORT else 1.0
+            full_w, full_h = int(w * scale), int(h * scale)
+
+            img.draft("RGB", (max_side, max_side))
+            img = ImageOps.exif_transpose(img)
+
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.thumbnail((max_side, max_side), Image.BILINEAR)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(400, f"파일 처리 실패: {type(e).__name__}")
+
+    bgr = cv2.cvtColor(np.asarray(img), cv2.COLOR_RGB2BGR)
+    h, w = bgr.shape[:2]
+    return bgr, full_w / w, full_h / h
+
+
 # ================= 전처리 =================
 def preprocess_doc(png_path: str, mode: str = "doc") -> Image.Image:
     """CLAHE + 대비 강화 전처리 (OpenCV 우선, 없으면 Pillow fallback)"""
@@ -119,14 +245,16 @@ def preprocess_doc(png_path: str, mode: str = "doc") -> Image.Image:
 
 
 # ================= OCR 엔진들 =================
-def _ocr_with_conf_tesseract(img: Image.Image, lang="kor+eng", psm=6, timeout=60) -> Tuple[str, float]:
+def _ocr_with_conf_tesseract(img: Image.Image, lang="kor+eng", psm=6, timeout=60, words: list | None = None) -> Tuple[str, float]:
     """
     Tesseract 호출 + word-level confidence로 중앙값 스코어 계산.
     - 큰 이미지는 max side 2000px로 축소(속도/안정성)
     - timeout 기본 60초
+    - words: 리스트를 넘기면 단어 박스 [x1,y1,x2,y2,conf,text,0](입력 이미지 좌표)를 추가
     """
     W, H = img.size
     max_side = max(W, H)
+    scale = 1.0
     if max_side > 2000:
         scale = 2000 / max_side
         img = img.resize((int(W*scale), int(H*scale)), Image.LANCZOS)
@@ -151,23 +279,178 @@ def _ocr_with_conf_tesseract(img: Image.Image, lang="kor+eng", psm=6, timeout=60
         except Exception:
             continue
     score = median(confs) if confs else -1.0
+    if words is not None:
+        words.extend(_tesseract_word_boxes(data, scale))
     return text.strip(), score
 
 
-def _ocr_with_paddle(img: Image.Image) -> Tuple[str | None, float]:
-    """PaddleOCR 호출(텍스트 결합 + 평균 스코어)"""
-    if not (_HAS_PADDLE and _HAS_CV2):
-        return None, -1.0
-    bgr = cv2.cvtColor(np.array(img.convert("RGB")), cv2.COLOR_RGB2BGR)
+def _tesseract_word_boxes(data: dict, scale: float = 1.0) -> list:
+    """image_to_data(DICT) → [[x1,y1,x2,y2,conf,text,0], ...] (축소 전 좌표)"""
+    out = []
+    for i, word in enumerate(data.get("text", [])):
+        word = (word or "").strip()
+        try:
+            conf = float(data["conf"][i])
+        except Exception:
+            continue
+        if not word or conf < 0:
+            continue
+        x, y = data["left"][i] / scale, data["top"][i] / scale
+        out.append([int(x), int(y), int(x + data["width"][i] / scale), int(y + data["height"][i] / scale),
+                    round(conf, 1), word, 0])
+    return out
+
+
+def _tesseract_lines(img: Image.Image, lang="kor+eng", psm=6, timeout=60) -> list:
+    """
+    Tesseract image_to_data → 줄 단위 묶음.
+    return: [{"key": (block, par, line), "bbox": [x1,y1,x2,y2](원본 좌표), "text": str, "conf": float,
+              "boxes": [[x1,y1,x2,y2,conf,text,0], ...]}, ...]
+    """
+    W, H = img.size
+    scale = 1.0
+    if max(W, H) > 2000:
+        scale = 2000 / max(W, H)
+        img = img.resize((int(W*scale), int(H*scale)), Image.LANCZOS)
+
+    cfg = f"--oem 3 --psm {psm} -c preserve_interword_spaces=1"
     try:
-        res = _paddle.ocr(bgr)
-    except Exception as e:
-        print(f"[PaddleOCR] 오류: {e}")
-        return None, -1.0
+        data = pytesseract.image_to_data(
+            img, config=cfg, lang=lang, timeout=timeout,
+            output_type=pytesseract.Output.DICT
+        )
+    except pytesseract.TesseractNotFoundError:
+        raise HTTPException(500, "Tesseract 미설치")
+    except RuntimeError as e:
+        raise RuntimeError("Tesseract process timeout") from e
 
+    lines: Dict[Tuple[int, int, int], Dict[str, Any]] = {}
+    for i, word in enumerate(data.get("text", [])):
+        word = (word or "").strip()
+        try:
+            conf = float(data["conf"][i])
+        except Exception:
+            continue
+        if not word or conf < 0:
+            continue
+        key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        x, y = data["left"][i] / scale, data["top"][i] / scale
+        x2, y2 = x + data["width"][i] / scale, y + data["height"][i] / scale
+        ln = lines.setdefault(key, {"key": key, "bbox": [x, y, x2, y2], "words": [], "confs": [], "boxes": []})
+        b = ln["bbox"]
+        b[0], b[1], b[2], b[3] = min(b[0], x), min(b[1], y), max(b[2], x2), max(b[3], y2)
+        ln["words"].append(word)
+        ln["confs"].append(conf)
+        ln["boxes"].append([int(x), int(y), int(x2), int(y2), round(conf, 1), word, 0])
+
+    out = []
+    for key in sorted(lines):
+        ln = lines[key]
+        out.append({
+            "key": key,
+            "bbox": [int(v) for v in ln["bbox"]],
+            "text": " ".join(ln["words"]),
+            "conf": sum(ln["confs"]) / len(ln["confs"]),
+            "boxes": ln["boxes"],
+        })
+    return out
+
+
+def _ocr_line_ensemble(
+    img: Image.Image,
+    lang: str,
+    psm: int = 6,
+    timeout: int = 60,
+    threshold: float = LINE_CONF_THRESHOLD,
+    use_paddle: bool = True,
+    use_easyocr: bool = False,
+    paddle_backend: str = "paddle",
+    words: list | None = None,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    줄 단위 앙상블:
+      1) Tesseract로 줄 박스/신뢰도 확보
+      2) threshold 미만 줄만 잘라서 무거운 엔진(Paddle/ONNX, EasyOCR)으로 재인식
+      3) 줄마다 점수가 가장 높은 결과를 원래 위치에 병합(문단 경계는 빈 줄)
+    return: (후처리 전 텍스트, meta)
+    """
+    lines = _tesseract_lines(img, lang=lang, psm=psm, timeout=timeout)
+    heavy = []
+    if use_paddle:
+        heavy.append(("paddle-onnx", _ocr_with_onnx) if paddle_backend == "onnx" else ("paddle", _ocr_with_paddle))
+    if use_easyocr:
+        heavy.append(("easyocr", _ocr_with_easyocr))
+
+    W, H = img.size
+    pad = 4
+    escalated, replaced, heavy_px = 0, {}, 0
+    for ln in lines:
+        ln["engine"] = "tesseract"
+        if ln["conf"] >= threshold or not heavy:
+            continue
+        x1, y1, x2, y2 = ln["bbox"]
+        box = (max(0, x1 - pad), max(0, y1 - pad), min(W, x2 + pad), min(H, y2 + pad))
+        if box[2] - box[0] < 2 or box[3] - box[1] < 2:
+            continue
+        crop = img.crop(box)
+        escalated += 1
+        heavy_px += (box[2] - box[0]) * (box[3] - box[1]) * len(heavy)
+        for name, fn in heavy:
+            try:
+                txt, score = fn(crop, lang=lang)
+            except Exception as e:
+                print(f"[Ensemble] {name} 실패: {e}")
+                continue
+            # EasyOCR 점수는 0~1 → Tesseract/Paddle과 같은 0~100 척도로 비교
+            if name == "easyocr" and 0 <= score <= 1:
+                score *= 100
+            if txt and score > ln["conf"]:
+                ln["text"], ln["conf"], ln["engine"] = " ".join(txt.split("\n")), score, name
+                replaced[name] = replaced.get(name, 0) + 1
+
+    # 병합: 같은 (block, par)는 줄바꿈, 문단이 바뀌면 빈 줄
+    parts, prev_par = [], None
+    for ln in lines:
+        par = ln["key"][:2]
+        if prev_par is not None and par != prev_par:
+            parts.append("")
+        parts.append(ln["text"])
+        prev_par = par
+
+    if words is not None:
+        # 교체되지 않은 줄은 Tesseract 단어 박스, 교체된 줄은 줄 박스 하나
+        for ln in lines:
+            if ln["engine"] == "tesseract":
+                words.extend(ln["boxes"])
+            else:
+                words.append([*ln["bbox"], round(ln["conf"], 1), ln["text"], 1])
+
+    confs = [ln["conf"] for ln in lines]
+    return "\n".join(parts), {
+        "lines": len(lines),
+        "escalated": escalated,
+        "replaced": replaced,
+        "threshold": threshold,
+        "score": round(sum(confs) / len(confs), 2) if confs else -1.0,
+        "heavy_pixel_ratio": round(heavy_px / max(1, W * H), 4),
+    }
+
+
+def _quad_bbox(quad) -> list | None:
+    """4점 폴리곤 → [x1,y1,x2,y2]"""
+    try:
+        xs = [float(p[0]) for p in quad]
+        ys = [float(p[1]) for p in quad]
+    except Exception:
+        return None
+    return [int(min(xs)), int(min(ys)), int(max(xs)), int(max(ys))] if xs else None
+
+
+def _parse_paddle_result(res, words: list | None = None) -> Tuple[str, float]:
+    """PaddleOCR.ocr() 형식 결과 → (줄 결합 텍스트, 평균 스코어 0~100). words: 줄 박스 추가"""
     lines, confs = [], []
-    for page in res:
-        for item in page:
+    for page in res or []:
+        for item in page or []:
             if not isinstance(item, (list, tuple)) or len(item) < 2:
                 continue
             text_conf = item[1]
@@ -178,31 +461,159 @@ def _ocr_with_paddle(img: Image.Image) -> Tuple[str | None, float]:
             if txt and txt.strip():
                 lines.append(txt.strip())
                 confs.append(conf * 100 if 0 <= conf <= 1 else conf)
+                box = _quad_bbox(item[0]) if words is not None else None
+                if box:
+                    words.append([*box, round(confs[-1], 1), txt.strip(), 1])
 
     text = "\n".join(lines).strip()
     score = (sum(confs) / len(confs)) if confs else -1.0
     return text, score
 
 
-def _ocr_with_easyocr(img: Image.Image) -> Tuple[str | None, float]:
+def _ocr_with_paddle(img: Image.Image, lang: str = "kor+eng", words: list | None = None) -> Tuple[str | None, float]:
+    """PaddleOCR 호출(텍스트 결합 + 평균 스코어)"""
+    engine = _get_paddle(lang) if _HAS_CV2 else None
+    if engine is None:
+        return None, -1.0
+    bgr = cv2.cvtColor(np.array(img.convert("RGB")), cv2.COLOR_RGB2BGR)
+    try:
+        res = engine.ocr(bgr)
+    except Exception as e:
+        print(f"[PaddleOCR] 오류: {e}")
+        return None, -1.0
+    return _parse_paddle_result(res, words)
+
+
+def _ocr_with_onnx(img: Image.Image, lang: str = "kor+eng", words: list | None = None) -> Tuple[str | None, float]:
+    """PaddleOCR 모델 ONNX Runtime(CPU) 호출 — _ocr_with_paddle과 동일 출력"""
+    if not (_HAS_ONNX and _HAS_CV2):
+        return None, -1.0
+    engine = _get_onnx(lang)
+    if engine is None:
+        return None, -1.0
+    bgr = cv2.cvtColor(np.array(img.convert("RGB")), cv2.COLOR_RGB2BGR)
+    try:
+        res = engine.ocr(bgr)
+    except Exception as e:
+        print(f"[ONNX] 오류: {e}")
+        return None, -1.0
+    return _parse_paddle_result(res, words)
+
+
+def _ocr_with_easyocr(img: Image.Image, lang: str = "kor+eng", words: list | None = None) -> Tuple[str | None, float]:
     """EasyOCR 호출(텍스트 결합 + 평균 스코어)"""
-    if not _HAS_EASYOCR:
+    engine = _get_easyocr(lang)
+    if engine is None:
         return None, -1.0
     arr = np.array(img.convert("RGB"))
-    res = _easyocr.readtext(arr)
+    res = engine.readtext(arr)
     lines, confs = [], []
-    for _, txt, conf in res:
+    for quad, txt, conf in res:
         if txt and str(txt).strip():
             lines.append(str(txt).strip())
             confs.append(float(conf))
+            box = _quad_bbox(quad) if words is not None else None
+            if box:
+                words.append([*box, round(float(conf) * 100, 1), str(txt).strip(), 1])
     text = "\n".join(lines).strip()
     score = (sum(confs) / len(confs)) if confs else -1.0
     return text, score
 
 
+# ================= 언어/스크립트 감지 =================
+_LATIN_WORD = re.compile(r"^[A-Za-z][A-Za-z'.,:;-]*$")
+DETECT_SAMPLE_SIDE = 800     # 감지용 축소 샘플 긴 변(px)
+ENG_PROBE_CONF = 70.0        # eng 단독 프로브: 평균 단어 신뢰도 하한
+ENG_PROBE_MIN_WORDS = 3      # eng 단독 프로브: 최소 영문 단어 수
+
+
+def _detect_sample(img: Image.Image, side: int = DETECT_SAMPLE_SIDE) -> Image.Image:
+    W, H = img.size
+    if max(W, H) <= side:
+        return img
+    scale = side / max(W, H)
+    return img.resize((max(1, int(W * scale)), max(1, int(H * scale))), Image.BILINEAR)
+
+
+def _eng_probe(sample: Image.Image, timeout: int) -> Tuple[bool, float, int]:
+    """
+    단일 스크립트(eng) 빠른 프로브. 한글 페이지를 eng 모델로 읽으면 단어 신뢰도가 낮고 영문 단어가 적음.
+    return: (영문 페이지로 판단, 평균 신뢰도, 영문 단어 수)
+    """
+    data = pytesseract.image_to_data(sample, lang="eng", config="--oem 3 --psm 6",
+                                     output_type=pytesseract.Output.DICT, timeout=timeout)
+    confs = []
+    for word, conf in zip(data.get("text", []), data.get("conf", [])):
+        try:
+            conf = float(conf)
+        except (TypeError, ValueError):
+            continue
+        if conf >= 0 and _LATIN_WORD.match((word or "").strip()):
+            confs.append(conf)
+    mean = sum(confs) / len(confs) if confs else 0.0
+    return len(confs) >= ENG_PROBE_MIN_WORDS and mean >= ENG_PROBE_CONF, mean, len(confs)
+
+
+def detect_script(img: Image.Image, timeout: int = 10) -> Dict[str, Any]:
+    """
+    저비용 스크립트/방향 감지 → OCR 언어 조합 결정.
+    1) Tesseract OSD(축소 샘플): 방향(rotate) + 스크립트(Hangul/Latin)
+    2) OSD 실패 또는 Latin 판단이 불확실할 때만: eng 단독 빠른 프로브(단어 신뢰도)로 eng / kor+eng 결정
+       (kor+eng 결합 모델로 샘플을 읽지 않음. Hangul은 불확실해도 결과가 kor+eng라 프로브 불필요)
+    return: {"lang": "eng"|"kor+eng", "rotate": int, "method": str, ...}
+    """
+    sample = _detect_sample(img)
+    info: Dict[str, Any] = {"lang": "kor+eng", "rotate": 0, "method": "default"}
+
+    try:
+        osd = pytesseract.image_to_osd(sample, output_type=pytesseract.Output.DICT, timeout=timeout)
+        script = str(osd.get("script", ""))
+        info.update({
+            "method": "osd",
+            "script": script,
+            "script_conf": round(float(osd.get("script_conf", 0.0)), 2),
+        })
+        if float(osd.get("orientation_conf", 0.0)) >= 2.0:
+            info["rotate"] = int(osd.get("rotate", 0)) % 360
+        # Hangul 문서는 영문 혼용이 흔하므로 kor+eng 유지(기본값과 같음)
+        if script == "Hangul" or (script == "Latin" and info["script_conf"] >= 1.0):
+            info["lang"] = "eng" if script == "Latin" else "kor+eng"
+            return info
+    except Exception as e:
+        # osd.traineddata 미설치/텍스트 부족 등 → eng 프로브로 대체
+        info["osd_error"] = str(e)[:120]
+
+    try:
+        probe = sample.rotate(-info["rotate"], expand=True) if info["rotate"] else sample
+        is_eng, mean, n = _eng_probe(probe, timeout)
+        info.update({"lang": "eng" if is_eng else "kor+eng", "method": f"{info['method']}+eng-probe",
+                     "probe_conf": round(mean, 1), "probe_words": n})
+    except Exception as e:
+        info["probe_error"] = str(e)[:120]
+    return info
+
+
+def detect_page_script(page, timeout: int = 10) -> Dict[str, Any]:
+    """
+    페이지 단위 스크립트/방향 감지(영역 OCR 전에 1회). page: 이미지 경로 또는 디코딩된 BGR 배열.
+    결과의 lang/rotate를 ocr_text_region에 그대로 넘기면 블록마다 감지하지 않음
+    """
+    if isinstance(page, Image.Image):
+        img = page
+    elif _HAS_CV2 and isinstance(page, np.ndarray):
+        img = Image.fromarray(cv2.cvtColor(page, cv2.COLOR_BGR2RGB))
+    else:
+        img = Image.open(page)
+    return detect_script(img, timeout=timeout)
+
+
 # ================= 후처리 =================
 def _postprocess(text: str) -> str:
-    """띄어쓰기/줄바꿈/구두점 보정(한국어 친화)"""
+    """
+    띄어쓰기/줄바꿈/구두점 보정(한국어 친화)
+    ※ 기준(reference) 구현. 실제 경로는 normalize_ocr_text(단일 패스)가
+      _postprocess → clean_ocr_text 와 동일한 결과를 생성한다.
+    """
     if not text:
         return ""
     text = text.replace("\r\n", "\n").replace("\r", "\n")
@@ -219,27 +630,87 @@ def _postprocess(text: str) -> str:
 # ================= 메인 OCR 로직 =================
 def ocr_best(
     img: Image.Image,
-    lang: str = "kor+eng",
+    lang: str = "auto",               # "auto": 스크립트 감지 / 그 외: 수동 지정(kor+eng, eng, ...)
     psms: Tuple[int, ...] = (6,),     # 기본 psm 6만 시도(문단/문장)
     timeout: int = 60,                # 기본 60초
     use_paddle: bool = True,
-    use_easyocr: bool = False
+    use_easyocr: bool = False,
+    paddle_backend: str | None = None,  # "paddle" | "onnx" (기본: PADDLE_BACKEND)
+    normalize: bool = True,             # False: 후처리 전 원문 반환(파이프라인 postprocess 단계용)
+    ensemble: str | None = None,        # "page"(엔진별 전체 비교) | "line"(저신뢰 줄만 재인식), 기본: OCR_ENSEMBLE
+    geometry: bool = False,             # True: 선택된 엔진의 단어/줄 박스를 meta["words"]로 반환
+    rotate: int = 0                     # lang 수동 지정 시 적용할 방향 보정(페이지 감지 결과)
 ) -> Tuple[str, Dict[str, Any]]:
     """
     다중 엔진 호출 → 신뢰도(score)로 최고 결과 선택.
     - 테서랙트 timeout 발생 시 이후 PSM은 즉시 스킵하고 다른 엔진으로 전환.
+    - ensemble="line"이 실패하거나 줄을 하나도 못 찾으면 페이지 단위 앙상블로 대체(meta["line_fallback"]).
+    - lang="auto"면 detect_script로 최소 언어 조합/방향을 정해 모든 엔진에 적용.
+      이미 감지한 결과가 있으면(페이지 단위) lang/rotate로 넘겨 감지를 건너뜀.
+    - geometry=True면 박스 [x1,y1,x2,y2,conf,text,level(0=단어,1=줄)]를 입력 이미지 좌표로 반환.
     """
+    orig_size = img.size
+    if lang == "auto":
+        script = detect_script(img)
+        lang = script["lang"]
+        if script.get("rotate"):
+            img = img.rotate(-script["rotate"], expand=True)
+    else:
+        script = {"lang": lang, "rotate": rotate % 360, "method": "manual"}
+        if script["rotate"]:
+            img = img.rotate(-script["rotate"], expand=True)
+
+    def _geom(words):
+        return _unrotate_boxes(words, script.get("rotate", 0), *orig_size)
+
+    backend = paddle_backend or PADDLE_BACKEND
+    line_fallback = None
+    if (ensemble or OCR_ENSEMBLE) == "line":
+        words = [] if geometry else None
+        try:
+            text, info = _ocr_line_ensemble(
+                img, lang=lang, psm=psms[0], timeout=timeout,
+                use_paddle=use_paddle, use_easyocr=use_easyocr, paddle_backend=backend, words=words,
+            )
+            if not info["lines"]:
+                line_fallback = "no-lines"
+        except Exception as e:
+            # Tesseract 타임아웃/오류 → 페이지 단위 앙상블로(다른 엔진은 그대로 시도)
+            print(f"[Ensemble] 줄 단위 실패, 페이지 단위로 전환: {e}")
+            line_fallback = f"{type(e).__name__}: {e}"
+    if (ensemble or OCR_ENSEMBLE) == "line" and line_fallback is None:
+        if normalize:
+            text = normalize_ocr_text(text) or "(인식 결과 없음)"
+        meta = {
+            "engine": "ensemble-line",
+            "score": info["score"],
+            "ensemble": info,
+            "lang": lang,
+            "script": script,
+        }
+        if geometry:
+            meta["words"] = _geom(words)
+        return text, meta
+
+    # 엔진별 박스(최종 선택된 엔진 것만 반환)
+    t_words = [] if geometry else None
+    p_words = [] if geometry else None
+    e_words = [] if geometry else None
+
     best_t = ("", -1.0, None)
-    tesseract_failed = False
+    # 줄 단위에서 이미 타임아웃났으면 Tesseract는 다시 돌리지 않음
+    tesseract_failed = bool(line_fallback) and "timeout" in line_fallback.lower()
 
     # Tesseract (여러 PSM)
     for p in psms:
         if tesseract_failed:
             break
         try:
-            t, s = _ocr_with_conf_tesseract(img, lang=lang, psm=p, timeout=timeout)
+            w = [] if geometry else None
+            t, s = _ocr_with_conf_tesseract(img, lang=lang, psm=p, timeout=timeout, words=w)
             if s > best_t[1]:
                 best_t = (t, s, p)
+                t_words = w
         except Exception as e:
             print(f"[OCR] psm={p} 실패: {e}")
             if "timeout" in str(e).lower():
@@ -247,11 +718,15 @@ def ocr_best(
 
     t_text, t_score, chosen_psm = best_t
 
-    # Paddle
+    # Paddle (paddleocr 또는 ONNX Runtime 백엔드)
+    p_name = "paddle-onnx" if backend == "onnx" else "paddle"
     p_text, p_score = (None, -1.0)
     if use_paddle:
         try:
-            p_text, p_score = _ocr_with_paddle(img)
+            if backend == "onnx":
+                p_text, p_score = _ocr_with_onnx(img, lang=lang, words=p_words)
+            else:
+                p_text, p_score = _ocr_with_paddle(img, lang=lang, words=p_words)
         except Exception as e:
             print(f"[PaddleOCR] 실패: {e}")
 
@@ -259,43 +734,82 @@ def ocr_best(
     e_text, e_score = (None, -1.0)
     if use_easyocr:
         try:
-            e_text, e_score = _ocr_with_easyocr(img)
+            e_text, e_score = _ocr_with_easyocr(img, lang=lang, words=e_words)
         except Exception as e:
             print(f"[EasyOCR] 실패: {e}")
 
     # 후보 정리 및 최종 선택
     candidates = [
         ("tesseract", t_text, t_score),
-        ("paddle",    p_text, p_score),
+        (p_name,      p_text, p_score),
         ("easyocr",   e_text, e_score),
     ]
     # 내용 없는 후보는 score -1로 취급
     def eff_score(x): return x[2] if (x[1] and isinstance(x[2], (int, float))) else -1.0
     best = max(candidates, key=eff_score)
 
-    final_text = _postprocess(best[1] or "")
-    final_text = clean_ocr_text(final_text)
+    if normalize:
+        final_text = normalize_ocr_text(best[1] or "") or "(인식 결과 없음)"
+    else:
+        final_text = best[1] or ""
 
-    return (final_text or "(인식 결과 없음)"), {
+    meta = {
         "engine": best[0],
         "score": round(best[2], 2) if isinstance(best[2], (int, float)) else -1.0,
         "tesseract_score": round(t_score, 2) if isinstance(t_score, (int, float)) else -1.0,
         "paddle_score":    round(p_score, 2) if isinstance(p_score, (int, float)) else -1.0,
         "easyocr_score":   round(e_score, 2) if isinstance(e_score, (int, float)) else -1.0,
-        "psm": chosen_psm
+        "psm": chosen_psm,
+        "lang": lang,
+        "script": script,
     }
+    if line_fallback:
+        meta["line_fallback"] = line_fallback
+    if geometry:
+        meta["words"] = _geom({"tesseract": t_words, p_name: p_words, "easyocr": e_words}[best[0]] or [])
+    return final_text, meta
+
+
+def _unrotate_boxes(words: list | None, rotate: int, W: int, H: int) -> list:
+    """
+    img.rotate(-rotate, expand=True) 좌표의 박스 → 회전 전(W×H) 좌표.
+    rotate는 OSD 결과(0/90/180/270, 시계 방향 보정 각도)
+    """
+    if not words:
+        return []
+    rotate %= 360
+    if rotate == 0:
+        return words
+    out = []
+    for w in words:
+        x1, y1, x2, y2 = w[:4]
+        if rotate == 90:
+            nb = [y1, H - x2, y2, H - x1]
+        elif rotate == 180:
+            nb = [W - x2, H - y2, W - x1, H - y1]
+        elif rotate == 270:
+            nb = [W - y2, x1, W - y1, x2]
+        else:
+            nb = [x1, y1, x2, y2]
+        out.append([int(v) for v in nb] + list(w[4:]))
+    return out
 
 
 # ================= 세그먼트 영역 OCR (세그멘테이션 연동) =================
-def ocr_text_region(img_path: str, bbox: list[int]) -> Dict[str, Any]:
+def ocr_text_region(img_path, bbox: list[int], lang: str = "kor+eng", normalize: bool = True,
+                    geometry: bool = False, rotate: int = 0) -> Dict[str, Any]:
     """
     세그멘테이션된 텍스트 영역(bbox)에 대해 OCR 수행.
-    return: {"text": ..., "meta": {...}}
+    - img_path: 이미지 경로 또는 이미 디코딩된 BGR 배열(공유 페이지 뷰 포함, 재디코딩 없음)
+    - lang/rotate: 페이지 감지 결과(detect_page_script) 또는 수동 지정. "auto"면 블록마다 감지(OCR_DETECT=block)
+    - normalize: False면 후처리 전 원문(text) 반환
+    - geometry: True면 단어/줄 박스를 페이지 좌표로 "words"에 포함
+    return: {"text": ..., "meta": {...}(, "words": [[x1,y1,x2,y2,conf,text,level], ...])}
     """
     if not _HAS_CV2:
         raise HTTPException(500, "cv2 미설치로 영역 OCR 불가")
     import cv2
-    bgr = cv2.imread(img_path)
+    bgr = img_path if isinstance(img_path, np.ndarray) else cv2.imread(img_path)
     if bgr is None:
         raise HTTPException(400, "이미지 로드 실패")
     x1, y1, x2, y2 = map(int, bbox[:4])
@@ -304,8 +818,13 @@ def ocr_text_region(img_path: str, bbox: list[int]) -> Dict[str, Any]:
     roi = bgr[y1:y2, x1:x2]
     pil_roi = Image.fromarray(cv2.cvtColor(roi, cv2.COLOR_BGR2RGB))
 
-    text, meta = ocr_best(pil_roi, lang="kor+eng", psms=(6,), timeout=60)
-    return {"text": text, "meta": meta}
+    text, meta = ocr_best(pil_roi, lang=lang, psms=(6,), timeout=60, normalize=normalize, geometry=geometry,
+                          rotate=rotate)
+    if not geometry:
+        return {"text": text, "meta": meta}
+    # ROI 좌표 → 페이지 좌표
+    words = [[w[0] + x1, w[1] + y1, w[2] + x1, w[3] + y1, *w[4:]] for w in meta.pop("words", [])]
+    return {"text": text, "meta": meta, "words": words}
 
 
 # ================= End-to-End(단일 업로드 OCR) =================
@@ -313,7 +832,7 @@ def run_ocr_on_upload(
     file: UploadFile,
     raw: bytes,
     mode: str = "doc",
-    lang: str = "kor+eng",
+    lang: str = "auto",
     timeout: int = 60,
     use_paddle: bool = True,
     use_easyocr: bool = False
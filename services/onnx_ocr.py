@@ -0,0 +1,251 @@
+# services/onnx_ocr.py — PaddleOCR(det/cls/rec) ONNX Runtime CPU 백엔드
+"""
+paddle2onnx로 내보낸 PP-OCR 모델을 onnxruntime(CPU)으로 실행.
+paddleocr/paddlepaddle 없이 동작하며 PaddleOCR.ocr()와 같은 결과 구조를 반환한다.
+
+모델 디렉터리 구성 (INT8 양자화 모델은 *_int8.onnx, 있으면 quantized=True 시 우선 사용)
+    <model_dir>/det.onnx        텍스트 검출(DB)
+    <model_dir>/cls.onnx        방향 분류(선택)
+    <model_dir>/rec.onnx        인식(CTC)
+    <model_dir>/rec_dict.txt    인식 문자 사전(한 줄에 한 글자)
+"""
+from __future__ import annotations
+
+import math, os
+from typing import Any, Dict, List, Tuple
+
+import cv2, numpy as np
+import onnxruntime as ort
+
+# ---------------- 기본 파라미터 (PaddleOCR 기본값과 동일) ----------------
+DET_LIMIT_SIDE = 960
+DET_THRESH = 0.3
+DET_BOX_THRESH = 0.6
+DET_UNCLIP_RATIO = 1.5
+DET_MAX_CANDIDATES = 1000
+CLS_SHAPE = (3, 48, 192)
+CLS_THRESH = 0.9
+REC_HEIGHT = 48
+REC_MIN_WIDTH = 320
+
+
+def _model_path(model_dir: str, name: str, quantized: bool) -> str | None:
+    if quantized:
+        q = os.path.join(model_dir, f"{name}_int8.onnx")
+        if os.path.exists(q):
+            return q
+    p = os.path.join(model_dir, f"{name}.onnx")
+    return p if os.path.exists(p) else None
+
+
+def _session(path: str, intra_threads: int, inter_threads: int) -> ort.InferenceSession:
+    so = ort.SessionOptions()
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    so.intra_op_num_threads = intra_threads
+    so.inter_op_num_threads = inter_threads
+    so.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if inter_threads > 1
+                         else ort.ExecutionMode.ORT_SEQUENTIAL)
+    return ort.InferenceSession(path, sess_options=so, providers=["CPUExecutionProvider"])
+
+
+# ---------------- 검출 후처리 유틸 ----------------
+def _order_points(pts: np.ndarray) -> np.ndarray:
+    """좌상 → 우상 → 우하 → 좌하 순서"""
+    pts = pts[np.argsort(pts[:, 0])]
+    left, right = pts[:2], pts[2:]
+    tl, bl = left[np.argsort(left[:, 1])]
+    tr, br = right[np.argsort(right[:, 1])]
+    return np.array([tl, tr, br, bl], dtype=np.float32)
+
+
+def _box_score(pred: np.ndarray, box: np.ndarray) -> float:
+    h, w = pred.shape
+    xmin = int(np.clip(np.floor(box[:, 0].min()), 0, w - 1))
+    xmax = int(np.clip(np.ceil(box[:, 0].max()), 0, w - 1))
+    ymin = int(np.clip(np.floor(box[:, 1].min()), 0, h - 1))
+    ymax = int(np.clip(np.ceil(box[:, 1].max()), 0, h - 1))
+    mask = np.zeros((ymax - ymin + 1, xmax - xmin + 1), dtype=np.uint8)
+    shifted = box.copy()
+    shifted[:, 0] -= xmin
+    shifted[:, 1] -= ymin
+    cv2.fillPoly(mask, shifted.reshape(1, -1, 2).astype(np.int32), 1)
+    return float(cv2.mean(pred[ymin:ymax + 1, xmin:xmax + 1], mask)[0])
+
+
+def _unclip_rect(rect: Tuple, ratio: float) -> Tuple:
+    """
+    minAreaRect 확장(pyclipper 오프셋 근사): d = 면적 * ratio / 둘레.
+    사각형이므로 각 변을 d만큼 밀어내면 된다.
+    """
+    (cx, cy), (w, h), angle = rect
+    area, perim = w * h, 2 * (w + h)
+    if perim <= 0:
+        return rect
+    d = area * ratio / perim
+    return (cx, cy), (w + 2 * d, h + 2 * d), angle
+
+
+def _crop_rotated(img: np.ndarray, box: np.ndarray) -> np.ndarray:
+    w = int(max(np.linalg.norm(box[0] - box[1]), np.linalg.norm(box[2] - box[3])))
+    h = int(max(np.linalg.norm(box[0] - box[3]), np.linalg.norm(box[1] - box[2])))
+    w, h = max(w, 1), max(h, 1)
+    dst = np.array([[0, 0], [w, 0], [w, h], [0, h]], dtype=np.float32)
+    M = cv2.getPerspectiveTransform(box.astype(np.float32), dst)
+    crop = cv2.warpPerspective(img, M, (w, h), borderMode=cv2.BORDER_REPLICATE,
+                               flags=cv2.INTER_CUBIC)
+    if h / w >= 1.5:
+        crop = np.rot90(crop)
+    return crop
+
+
+class OnnxPaddleOCR:
+    """
+    PaddleOCR 호환 ONNX 파이프라인.
+    - intra_threads/inter_threads: onnxruntime 스레드 수
+    - quantized: *_int8.onnx 모델 우선 사용
+    - rec_batch: 인식 크롭 배치 크기
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        intra_threads: int = 0,
+        inter_threads: int = 1,
+        quantized: bool = False,
+        rec_batch: int = 8,
+        use_angle_cls: bool = True,
+    ):
+        det = _model_path(model_dir, "det", quantized)
+        rec = _model_path(model_dir, "rec", quantized)
+        cls = _model_path(model_dir, "cls", quantized) if use_angle_cls else None
+        if not (det and rec):
+            raise FileNotFoundError(f"ONNX 모델(det/rec) 없음: {model_dir}")
+
+        self.det = _session(det, intra_threads, inter_threads)
+        self.rec = _session(rec, intra_threads, inter_threads)
+        self.cls = _session(cls, intra_threads, inter_threads) if cls else None
+        self.rec_batch = max(1, rec_batch)
+        self.models = {"det": det, "rec": rec, "cls": cls}
+
+        dict_path = os.path.join(model_dir, "rec_dict.txt")
+        with open(dict_path, encoding="utf-8") as f:
+            chars = [ln.rstrip("\r\n") for ln in f]
+        # CTC blank(0) + 사전 + 공백
+        self.charset = ["blank"] + chars + [" "]
+
+        # 정적 입력 폭이면 그 값 사용
+        shape = self.rec.get_inputs()[0].shape
+        self.rec_static_w = shape[3] if isinstance(shape[3], int) and shape[3] > 0 else None
+
+    # ---------------- 검출 ----------------
+    def _detect(self, bgr: np.ndarray) -> List[np.ndarray]:
+        h, w = bgr.shape[:2]
+        ratio = min(1.0, DET_LIMIT_SIDE / max(h, w))
+        rh = max(32, int(round(h * ratio / 32) * 32))
+        rw = max(32, int(round(w * ratio / 32) * 32))
+        x = cv2.resize(bgr, (rw, rh)).astype(np.float32) / 255.0
+        x = (x - np.array([0.485, 0.456, 0.406], np.float32)) / np.array([0.229, 0.224, 0.225], np.float32)
+        x = x.transpose(2, 0, 1)[None]
+
+        pred = self.det.run(None, {self.det.get_inputs()[0].name: x})[0][0, 0]
+        bitmap = (pred > DET_THRESH).astype(np.uint8)
+        contours, _ = cv2.findContours(bitmap, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+        sx, sy = w / rw, h / rh
+        boxes = []
+        for cnt in contours[:DET_MAX_CANDIDATES]:
+            rect = cv2.minAreaRect(cnt)
+            if min(rect[1]) < 3:
+                continue
+            box = cv2.boxPoints(rect)
+            if _box_score(pred, box) < DET_BOX_THRESH:
+                continue
+            rect = _unclip_rect(rect, DET_UNCLIP_RATIO)
+            if min(rect[1]) < 5:
+                continue
+            box = _order_points(cv2.boxPoints(rect))
+            box[:, 0] = np.clip(box[:, 0] * sx, 0, w - 1)
+            box[:, 1] = np.clip(box[:, 1] * sy, 0, h - 1)
+            boxes.append(box)
+
+        # 위 → 아래, 같은 줄은 왼 → 오
+        boxes.sort(key=lambda b: (b[0][1], b[0][0]))
+        for i in range(len(boxes) - 1):
+            for j in range(i, -1, -1):
+                a, b = boxes[j], boxes[j + 1]
+                if abs(b[0][1] - a[0][1]) < 10 and b[0][0] < a[0][0]:
+                    boxes[j], boxes[j + 1] = b, a
+                else:
+                    break
+        return boxes
+
+    # ---------------- 방향 분류 ----------------
+    def _classify(self, crops: List[np.ndarray]) -> None:
+        if not self.cls:
+            return
+        c, ch, cw = CLS_SHAPE
+        name = self.cls.get_inputs()[0].name
+        for s in range(0, len(crops), self.rec_batch):
+            part = crops[s:s + self.rec_batch]
+            batch = np.zeros((len(part), c, ch, cw), np.float32)
+            for k, im in enumerate(part):
+                rw = min(cw, int(math.ceil(ch * im.shape[1] / max(im.shape[0], 1))))
+                x = cv2.resize(im, (max(rw, 1), ch)).astype(np.float32) / 255.0
+                batch[k, :, :, :x.shape[1]] = ((x - 0.5) / 0.5).transpose(2, 0, 1)
+            probs = self.cls.run(None, {name: batch})[0]
+            for k, p in enumerate(probs):
+                if int(np.argmax(p)) == 1 and float(p[1]) > CLS_THRESH:
+                    crops[s + k] = cv2.rotate(crops[s + k], cv2.ROTATE_180)
+
+    # ---------------- 인식 ----------------
+    def _ctc_decode(self, probs: np.ndarray) -> Tuple[str, float]:
+        idx = probs.argmax(axis=1)
+        conf = probs.max(axis=1)
+        keep = np.ones(len(idx), dtype=bool)
+        keep[1:] = idx[1:] != idx[:-1]
+        keep &= idx != 0
+        chars = [self.charset[i] for i in idx[keep] if i < len(self.charset)]
+        score = float(conf[keep].mean()) if keep.any() else 0.0
+        return "".join(chars), score
+
+    def _recognize(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        name = self.rec.get_inputs()[0].name
+        out: List[Tuple[str, float]] = [("", 0.0)] * len(crops)
+        # 종횡비 순으로 묶어 패딩 낭비 최소화
+        order = np.argsort([c.shape[1] / max(c.shape[0], 1) for c in crops])
+        for s in range(0, len(order), self.rec_batch):
+            ids = order[s:s + self.rec_batch]
+            max_ratio = max(REC_MIN_WIDTH / REC_HEIGHT,
+                            *(crops[i].shape[1] / max(crops[i].shape[0], 1) for i in ids))
+            bw = self.rec_static_w or int(math.ceil(REC_HEIGHT * max_ratio))
+            batch = np.zeros((len(ids), 3, REC_HEIGHT, bw), np.float32)
+            for k, i in enumerate(ids):
+                im = crops[i]
+                rw = min(bw, int(math.ceil(REC_HEIGHT * im.shape[1] / max(im.shape[0], 1))))
+                x = cv2.resize(im, (max(rw, 1), REC_HEIGHT)).astype(np.float32) / 255.0
+                batch[k, :, :, :x.shape[1]] = ((x - 0.5) / 0.5).transpose(2, 0, 1)
+            preds = self.rec.run(None, {name: batch})[0]
+            for k, i in enumerate(ids):
+                out[i] = self._ctc_decode(preds[k])
+        return out
+
+    def ocr(self, bgr: np.ndarray) -> List[List[Any]]:
+        """PaddleOCR.ocr()와 동일 구조: [[ [box, (text, score)], ... ]]"""
+        boxes = self._detect(bgr)
+        if not boxes:
+            return [[]]
+        crops = [_crop_rotated(bgr, b) for b in boxes]
+        self._classify(crops)
+        results = self._recognize(crops)
+        return [[[b.tolist(), (t, s)] for b, (t, s) in zip(boxes, results)]]
+
+
+def load_from_env(model_dir: str) -> OnnxPaddleOCR:
+    """환경변수 기반 생성(ONNX_INTRA_THREADS / ONNX_INTER_THREADS / ONNX_INT8 / ONNX_REC_BATCH)"""
+    return OnnxPaddleOCR(
+        model_dir,
+        intra_threads=int(os.getenv("ONNX_INTRA_THREADS", "0")),
+        inter_threads=int(os.getenv("ONNX_INTER_THREADS", "1")),
+        quantized=os.getenv("ONNX_INT8", "0") in ("1", "true", "True"),
+        rec_batch=int(os.getenv("ONNX_REC_BATCH", "8")),
+    )
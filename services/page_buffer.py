@@ -0,0 +1,263 @@
+# services/page_buffer.py — 디코딩된 페이지 배열의 프로세스 간 공유(공유 메모리 / 메모리 맵 파일)
+"""
+페이지는 한 번만 디코딩해 공유 메모리에 두고, 워커 프로세스에는 핸들(이름/shape/dtype)만 넘긴다.
+
+- put(arr) → PageHandle: multiprocessing.shared_memory 세그먼트(실패/PAGE_SHM=0 이면 .npy memmap 파일)
+- attach(handle) → ndarray: 워커 쪽 무복사 읽기 전용 뷰(프로세스별로 최근 매핑 재사용)
+- 참조 카운트: 소유 프로세스가 acquire/release(또는 lease)로 관리, 0이 되면 unlink/삭제
+- 워커 태스크(run_segment / run_region_ocr / run_overlay)는 핸들만 받아 PNG 재디코딩 없이 처리
+
+PAGE_WORKERS>0 이면 page_pool()이 프로세스 풀을 제공(0: 기존처럼 스레드에서 같은 배열 공유)
+"""
+from __future__ import annotations
+
+import atexit, os, sys, tempfile, threading, uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Tuple
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+    _HAS_SHM = True
+except Exception:
+    shared_memory = resource_tracker = None
+    _HAS_SHM = False
+
+PAGE_SHM = os.getenv("PAGE_SHM", "1") == "1"
+PAGE_DIR = Path(os.getenv("PAGE_DIR", os.path.join(tempfile.gettempdir(), "docassistant-pages")))
+PAGE_WORKERS = int(os.getenv("PAGE_WORKERS", "0"))
+PAGE_MP_START = os.getenv("PAGE_MP_START", "spawn")    # spawn | forkserver | fork
+_ATTACH_CACHE = 4                                        # 워커당 유지할 매핑 수
+
+
+class PageHandle(NamedTuple):
+    kind: str                  # "shm" | "file"
+    name: str                  # 세그먼트 이름 또는 .npy 경로
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+# ================= 소유 프로세스: 생성/참조 카운트 =================
+class PageBufferManager:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refs: Dict[str, int] = {}
+        self._owned: Dict[str, Any] = {}     # name → SharedMemory | 파일 경로
+
+    def put(self, arr: np.ndarray) -> PageHandle:
+        """배열을 공유 버퍼로 1회 복사하고 핸들 반환(참조 카운트 1)"""
+        arr = np.ascontiguousarray(arr)
+        handle = None
+        if PAGE_SHM and _HAS_SHM:
+            try:
+                shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes),
+                                                 name=f"dapg_{uuid.uuid4().hex[:16]}")
+                np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+                handle = PageHandle("shm", shm.name, tuple(arr.shape), arr.dtype.str)
+                owned = shm
+            except OSError as e:
+                # /dev/shm 부족 등 → 파일 매핑으로 대체
+                print(f"[PageBuffer] 공유 메모리 실패, 파일 사용: {e}")
+        if handle is None:
+            PAGE_DIR.mkdir(parents=True, exist_ok=True)
+            path = PAGE_DIR / f"{uuid.uuid4().hex}.npy"
+            mm = np.lib.format.open_memmap(path, mode="w+", dtype=arr.dtype, shape=arr.shape)
+            mm[...] = arr
+            mm.flush()
+            del mm
+            handle = PageHandle("file", str(path), tuple(arr.shape), arr.dtype.str)
+            owned = path
+        with self._lock:
+            self._owned[handle.name] = owned
+            self._refs[handle.name] = 1
+        return handle
+
+    def load(self, path: str) -> PageHandle:
+        """이미지 파일을 한 번 디코딩해 공유 버퍼에 올림"""
+        import cv2
+        arr = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if arr is None:
+            raise ValueError(f"이미지를 읽을 수 없습니다: {path}")
+        return self.put(arr)
+
+    def acquire(self, handle: PageHandle) -> PageHandle:
+        with self._lock:
+            if handle.name not in self._refs:
+                raise KeyError(f"해제된 페이지: {handle.name}")
+            self._refs[handle.name] += 1
+        return handle
+
+    def release(self, handle: PageHandle) -> None:
+        with self._lock:
+            n = self._refs.get(handle.name)
+            if n is None:
+                return
+            if n > 1:
+                self._refs[handle.name] = n - 1
+                return
+            del self._refs[handle.name]
+            owned = self._owned.pop(handle.name)
+        _free(handle, owned)
+
+    @contextmanager
+    def lease(self, arr_or_handle):
+        """with 블록 동안 페이지 유지(배열이면 put, 핸들이면 acquire) → 끝나면 release"""
+        handle = self.put(arr_or_handle) if isinstance(arr_or_handle, np.ndarray) else self.acquire(arr_or_handle)
+        try:
+            yield handle
+        finally:
+            self.release(handle)
+
+    def live(self) -> int:
+        with self._lock:
+            return len(self._refs)
+
+    def close_all(self) -> None:
+        with self._lock:
+            items = list(self._owned.items())
+            self._owned.clear()
+            self._refs.clear()
+        for name, owned in items:
+            _free(PageHandle("shm" if not isinstance(owned, Path) else "file", name, (), ""), owned)
+
+
+def _free(handle: PageHandle, owned) -> None:
+    _detach(handle.name)
+    try:
+        if handle.kind == "shm":
+            owned.unlink()      # 이름 제거 → 마지막 매핑이 닫히면 메모리 반환
+            owned.close()
+        else:
+            os.remove(owned)
+    except (OSError, BufferError):
+        pass
+
+
+pages = PageBufferManager()
+atexit.register(pages.close_all)
+
+
+# ================= 워커 프로세스: 무복사 연결 =================
+_attached: "OrderedDict[str, Tuple[Any, np.ndarray]]" = OrderedDict()
+_attach_lock = threading.Lock()
+
+
+_own_tracker = False      # 이 프로세스가 소유 프로세스와 다른 resource_tracker를 쓰는지(_pool_init에서 결정)
+
+
+def _open_shm(name: str):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # 3.12 이하: 연결만 해도 resource_tracker에 등록됨.
+    # 풀 워커는 소유 프로세스의 tracker를 물려받으므로(spawn/forkserver/fork 모두) 중복 등록은 무해하고
+    # 등록을 지우면 소유자의 unlink 때 tracker가 KeyError를 내고, 소유자가 죽었을 때 정리도 못 함 → 그대로 둠.
+    # 자체 tracker를 띄운 프로세스만 종료 시 세그먼트를 지우지 않도록 등록 해제
+    if _own_tracker:
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+    return shm
+
+
+def attach(handle: PageHandle) -> np.ndarray:
+    """핸들 → 읽기 전용 ndarray 뷰(복사 없음)"""
+    with _attach_lock:
+        hit = _attached.get(handle.name)
+        if hit is not None:
+            _attached.move_to_end(handle.name)
+            return hit[1]
+        if handle.kind == "shm":
+            shm = _open_shm(handle.name)
+            arr = np.ndarray(handle.shape, np.dtype(handle.dtype), buffer=shm.buf)
+        else:
+            shm = None
+            arr = np.load(handle.name, mmap_mode="r")
+        arr.flags.writeable = False
+        _attached[handle.name] = (shm, arr)
+        while len(_attached) > _ATTACH_CACHE:
+            _, (old, _arr) = _attached.popitem(last=False)
+            _close_mapping(old)
+        return arr
+
+
+def _close_mapping(shm) -> None:
+    if shm is None:
+        return
+    try:
+        shm.close()
+    except BufferError:
+        # 아직 참조 중인 뷰가 있으면 GC 때 정리
+        pass
+
+
+def _detach(name: str) -> None:
+    with _attach_lock:
+        hit = _attached.pop(name, None)
+    if hit is not None:
+        _close_mapping(hit[0])
+
+
+# ================= 워커 태스크(핸들만 전달) =================
+def run_segment(handle: PageHandle) -> dict:
+    from services.segment import segment_layout_array
+    return segment_layout_array(attach(handle))
+
+
+def run_region_ocr(handle: PageHandle, bbox, **kwargs) -> Dict[str, Any]:
+    from services.ocr_service import ocr_text_region
+    return ocr_text_region(attach(handle), bbox, **kwargs)
+
+
+def run_overlay(handle: PageHandle, layout: dict, out_path: str, **kwargs) -> str:
+    import cv2
+    from services.visualize import render_overlay
+    img = attach(handle).copy()          # 그리기용 사본(공유 페이지는 읽기 전용)
+    cv2.imwrite(out_path, render_overlay(img, layout, **kwargs))
+    return out_path
+
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _tracker_fd():
+    try:
+        return resource_tracker._resource_tracker._fd
+    except Exception:
+        return None
+
+
+def _pool_init() -> None:
+    # 워커 시작 시점에 tracker fd를 물려받지 않았다면 첫 연결 때 자체 tracker가 생김
+    global _own_tracker
+    _own_tracker = _HAS_SHM and _tracker_fd() is None
+
+
+def page_pool() -> ProcessPoolExecutor | None:
+    """PAGE_WORKERS>0 이면 공용 프로세스 풀(지연 생성), 아니면 None"""
+    global _pool
+    if PAGE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            if _HAS_SHM:
+                # 워커가 소유 프로세스의 tracker를 공유하도록 풀 생성 전에 띄움(소유자 비정상 종료 시 세그먼트 정리)
+                resource_tracker.ensure_running()
+            _pool = ProcessPoolExecutor(max_workers=PAGE_WORKERS, mp_context=get_context(PAGE_MP_START),
+                                        initializer=_pool_init)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
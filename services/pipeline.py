@@ -0,0 +1,844 @@
+# services/pipeline.py — 스테이지 DAG + 중간 산출물 저장 + 부분 재처리
+"""
+ingest → rasterize → dedup → segment → region_ocr → postprocess → overlay → persist
+                                                  └→ geometry(words.wgeo) ┘
+
+- 스테이지마다 (이름, 버전, 코드 해시, 파라미터, 입력 스테이지 산출물 해시)로 fingerprint 계산
+- 산출물은 artifacts/<doc_key>/<stage>.json (+ 이미지 파일), 상태는 manifest.json
+- fingerprint가 같고 산출물이 남아 있으면 스킵 → 코드/파라미터가 바뀐 스테이지부터만 재계산
+- 재계산 결과가 이전과 같으면(산출물 해시 동일) 하위 스테이지도 스킵
+- dedup: 페이지 pHash로 근사 중복(재스캔/DPI 차이/재촬영) 탐지. DEDUP_REUSE=1이면
+  일치 문서의 레이아웃/OCR을 좌표 환산해 재사용(페이지 전체에 고르게 고른 줄 DEDUP_PROBES개를
+  새로 OCR해 모두 일치할 때만 — 같은 양식에 다른 내용이 채워진 문서는 재사용하지 않음)
+
+CLI)
+    python -m services.pipeline reprocess                 # 전체 아카이브
+    python -m services.pipeline reprocess --ids 3 7 --workers 4
+    python -m services.pipeline reprocess --force postprocess --dry-run
+    python -m services.pipeline bootstrap                 # 파이프라인 이전 DB 레코드 등록
+"""
+from __future__ import annotations
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse, hashlib, inspect, json, mimetypes, shutil, threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARTIFACT_DIR = BASE_DIR / os.getenv("ARTIFACT_DIR", "artifacts")
+NO_TEXT = "(인식 결과 없음)"
+
+# 근사 중복 탐지/재사용
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "6"))      # pHash 해밍 거리(64bit 중)
+DEDUP_REUSE = os.getenv("DEDUP_REUSE", "0").lower() in ("1", "true", "yes")
+DEDUP_CONFIRM_RATIO = float(os.getenv("DEDUP_CONFIRM_RATIO", "0.9"))  # 확인 줄 텍스트 유사도 하한
+DEDUP_PROBES = int(os.getenv("DEDUP_PROBES", "8"))                    # 재사용 확인용으로 새로 OCR할 줄 수
+_PAGE_INDEX = None
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _json_hash(obj: Any) -> str:
+    return _sha256(json.dumps(obj, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+
+
+def _rel(path: Path | str) -> str:
+    """BASE_DIR 기준 상대경로(밖이면 절대경로)"""
+    p = Path(path).resolve()
+    try:
+        return str(p.relative_to(BASE_DIR))
+    except ValueError:
+        return str(p)
+
+
+# ================= 스테이지 정의 =================
+class Stage:
+    """
+    name/version/deps/params + 실행 함수.
+    code: 결과에 영향을 주는 함수 목록(그 함수가 속한 모듈 소스가 바뀌면 fingerprint 변경)
+    run(ctx, inputs) -> 산출물 dict (JSON 직렬화 가능)
+    """
+
+    def __init__(self, name: str, version: str, deps: List[str],
+                 run: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]],
+                 params: Callable[[], Dict[str, Any]] | None = None,
+                 code: Callable[[], List[Callable]] | None = None):
+        self.name = name
+        self.version = version
+        self.deps = deps
+        self.run = run
+        self._params = params or (lambda: {})
+        self._code = code or (lambda: [])
+        self._code_hash: str | None = None
+
+    def params(self) -> Dict[str, Any]:
+        return self._params()
+
+    def code_hash(self) -> str:
+        """
+        code 목록 함수가 속한 모듈의 소스 전체를 해시(모듈 수준 정규식/상수/헬퍼 변경도 반영).
+        이 모듈(pipeline)의 함수는 함수 소스만 — 모든 스테이지가 여기 있어 모듈 단위면 전부 무효화되고,
+        여기 설정값은 params로 fingerprint에 들어감
+        """
+        if self._code_hash is None:
+            srcs, seen = [], set()
+            for fn in [self.run, *self._code()]:
+                mod = inspect.getmodule(fn)
+                whole = mod is not None and mod.__name__ != __name__
+                key = mod.__name__ if whole else getattr(fn, "__qualname__", repr(fn))
+                if key in seen:
+                    continue
+                seen.add(key)
+                try:
+                    srcs.append(inspect.getsource(mod if whole else fn))
+                except (OSError, TypeError):
+                    srcs.append(key)
+            self._code_hash = _sha256("\n".join(srcs).encode("utf-8"))[:16]
+        return self._code_hash
+
+    def fingerprint(self, dep_hashes: Dict[str, str]) -> str:
+        return _json_hash({
+            "stage": self.name,
+            "version": self.version,
+            "code": self.code_hash(),
+            "params": self.params(),
+            "inputs": dep_hashes,
+        })
+
+
+# ---------------- 스테이지 구현 ----------------
+def _ingest(ctx, inputs):
+    # 내용에서 정해지는 값만(업로드마다 다른 파일명/형식은 ctx["upload"] → persist)
+    src = Path(ctx["doc_dir"]) / ctx["source_name"]
+    return {
+        "source": _rel(src),
+        "sha256": _sha256(src.read_bytes()),
+        "content_type": mimetypes.guess_type(src.name)[0],
+    }
+
+
+class _StoredFile:
+    """UploadFile 대용(save_upload_to_png가 쓰는 filename/content_type만 제공)"""
+
+    def __init__(self, filename: str, content_type: str | None):
+        self.filename = filename
+        self.content_type = content_type
+
+
+def _rasterize(ctx, inputs):
+    from services.ocr_service import save_upload_to_png
+    ing = inputs["ingest"]
+    raw = (BASE_DIR / ing["source"]).read_bytes()
+    # 원본 파일명 대신 저장본 이름(source.<ext>)으로 형식 판별
+    tmp = save_upload_to_png(_StoredFile(Path(ing["source"]).name, ing["content_type"]), raw, pdf_dpi=200)
+    out = Path(ctx["doc_dir"]) / "page.png"
+    shutil.move(tmp, out)
+    return {"png": _rel(out), "sha256": _sha256(out.read_bytes())}
+
+
+def _page(ctx, inputs):
+    """rasterize 결과 페이지를 실행 1회당 한 번만 디코딩(segment/region_ocr/overlay 공유, 읽기 전용)"""
+    page = ctx.get("page")
+    if page is None:
+        import cv2, numpy as np
+        page = cv2.imdecode(np.fromfile(str(BASE_DIR / inputs["rasterize"]["png"]), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if page is None:
+            raise RuntimeError("이미지 로드 실패")
+        page.flags.writeable = False
+        ctx["page"] = page
+    return page
+
+
+def _rasterize_params():
+    from services import ocr_service as OCR
+    return {"pdf_dpi": 200, "max_short": OCR.IMG_MAX_SHORT}
+
+
+def _page_index():
+    global _PAGE_INDEX
+    if _PAGE_INDEX is None:
+        from utils.phash import PageHashIndex
+        _PAGE_INDEX = PageHashIndex(ARTIFACT_DIR / "phash.idx")
+    return _PAGE_INDEX
+
+
+def _dedup(ctx, inputs):
+    """
+    페이지 pHash 계산 후 인덱스에 등록.
+    일치 문서 목록은 전역 인덱스 상태에 따라 달라지므로 산출물(fingerprint 대상)에 넣지 않고
+    필요한 스테이지가 _dedup_matches로 조회
+    """
+    from PIL import Image
+    from utils.phash import phash
+    with Image.open(BASE_DIR / inputs["rasterize"]["png"]) as img:
+        size = list(img.size)
+        h = phash(img)
+    _page_index().add(h, ctx["doc_key"])
+    return {"phash": f"{h:016x}", "size": size}
+
+
+def _dedup_matches(ctx, inputs) -> List[Dict[str, Any]]:
+    """이 문서보다 먼저 등록된 근사 중복 문서(가까운 순 최대 5건) — 강제 재실행해도 이후 업로드는 제외"""
+    h = int(inputs["dedup"]["phash"], 16)
+    matches = []
+    for dist, key in _page_index().lookup(h, DEDUP_MAX_DISTANCE, exclude=ctx["doc_key"], before=ctx["doc_key"])[:5]:
+        other = ARTIFACT_DIR / key
+        if _manifest_path(other).exists():
+            matches.append({"doc_key": key, "distance": dist, "record_id": load_manifest(other).get("record_id")})
+    return matches
+
+
+def _dedup_params():
+    return {"max_distance": DEDUP_MAX_DISTANCE}
+
+
+def _dedup_code():
+    from utils import phash as PH
+    return [PH.phash, PH.MultiIndexHash]
+
+
+def _reuse_source(inputs, matches: List[Dict[str, Any]], stage: str) -> Dict[str, Any] | None:
+    """
+    재사용할 일치 문서의 스테이지 산출물. 현재 코드/버전으로 계산된 것만 사용.
+    return: {"doc_key", "out", "sx", "sy"} 또는 None
+    """
+    if not DEDUP_REUSE:
+        return None
+    st = next(s for s in STAGES if s.name == stage)
+    W, H = inputs["dedup"]["size"]
+    for m in matches:
+        other = ARTIFACT_DIR / m["doc_key"]
+        done = load_manifest(other).get("stages", {})
+        prev, size_out = done.get(stage), other / "dedup.json"
+        if not prev or prev.get("version") != st.version or prev.get("code") != st.code_hash():
+            continue
+        if not (other / prev["output"]).exists() or not size_out.exists():
+            continue
+        oW, oH = json.loads(size_out.read_text(encoding="utf-8"))["size"]
+        return {
+            "doc_key": m["doc_key"],
+            "out": json.loads((other / prev["output"]).read_text(encoding="utf-8")),
+            "sx": W / oW,
+            "sy": H / oH,
+        }
+    return None
+
+
+def _probe_lines(prev_blocks: Dict[str, Any], n: int) -> List[Dict[str, Any]]:
+    """
+    일치 문서의 영역 OCR 단어 박스에서 읽기 순서상 고르게 n줄 선택(큰 블록 하나가 아니라 페이지 전체 분포).
+    return: [{"bbox": 원본 좌표, "text", "lang", "rotate"}, ...]
+    """
+    items = [(k, w) for k in sorted(prev_blocks, key=int) for w in prev_blocks[k].get("words") or []
+             if len(w) > 5 and str(w[5]).strip()]
+    if not items or n <= 0:
+        return []
+    out, seen = [], set()
+    for k, w in items[::max(1, len(items) // n)]:
+        # 같은 블록에서 세로 중심이 이 박스 안에 드는 단어 = 같은 줄
+        line = sorted((v for kk, v in items if kk == k and w[1] <= (v[1] + v[3]) / 2 <= w[3]), key=lambda v: v[0])
+        bbox = [min(v[0] for v in line), min(v[1] for v in line), max(v[2] for v in line), max(v[3] for v in line)]
+        if tuple(bbox) in seen:
+            continue
+        seen.add(tuple(bbox))
+        meta = prev_blocks[k].get("meta") or {}
+        out.append({"bbox": bbox, "text": " ".join(str(v[5]) for v in line), "lang": meta.get("lang") or "kor+eng",
+                    "rotate": (meta.get("script") or {}).get("rotate", 0)})
+        if len(out) >= n:
+            break
+    return out
+
+
+def _confirm_reuse(page, src: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    재사용 전 확인: 일치 문서의 줄 여러 개를 현재 페이지에서 새로 OCR해 텍스트 비교.
+    모든 줄이 DEDUP_CONFIRM_RATIO 이상이어야 통과(하나라도 낮으면 즉시 중단)
+    """
+    from difflib import SequenceMatcher
+    from services.ocr_service import ocr_text_region
+    probes = _probe_lines(src["out"]["blocks"], DEDUP_PROBES)
+    if not probes:
+        return {"ok": False, "reason": "no-words", "ratios": []}
+    H, W = page.shape[:2]
+    sx, sy, pad = src["sx"], src["sy"], 3
+    ratios = []
+    for pr in probes:
+        x1, y1, x2, y2 = pr["bbox"]
+        box = [max(0, int(x1 * sx) - pad), max(0, int(y1 * sy) - pad),
+               min(W - 1, int(x2 * sx) + pad), min(H - 1, int(y2 * sy) + pad)]
+        try:
+            got = ocr_text_region(page, box, lang=pr["lang"], rotate=pr["rotate"], normalize=False)["text"]
+        except Exception:
+            got = ""
+        ratios.append(round(SequenceMatcher(None, "".join(got.split()), "".join(pr["text"].split())).ratio(), 3))
+        if ratios[-1] < DEDUP_CONFIRM_RATIO:
+            break
+    ok = len(ratios) == len(probes) and min(ratios) >= DEDUP_CONFIRM_RATIO
+    return {"ok": ok, "doc_key": src["doc_key"], "ratios": ratios}
+
+
+def _segment(ctx, inputs):
+    from services.segment import segment_layout_array, scale_layout
+    check = None
+    if DEDUP_REUSE:
+        # 레이아웃과 영역 OCR이 모두 재사용 가능한 일치 문서만, 확인 OCR을 통과해야 레이아웃도 빌림
+        matches = _dedup_matches(ctx, inputs)
+        seg_src = _reuse_source(inputs, matches, "segment")
+        ocr_src = _reuse_source(inputs, [{"doc_key": seg_src["doc_key"]}], "region_ocr") if seg_src else None
+        if ocr_src:
+            check = _confirm_reuse(_page(ctx, inputs), ocr_src)
+            if check["ok"]:
+                layout = scale_layout(seg_src["out"]["layout"], seg_src["sx"], seg_src["sy"])
+                layout["reused_from"] = seg_src["doc_key"]
+                return {"layout": layout, "reuse_check": check}
+            print(f"[dedup] {seg_src['doc_key']} 재사용 취소(확인 줄 유사도 {check['ratios']})")
+    layout = segment_layout_array(_page(ctx, inputs))
+    if not isinstance(layout, dict) or "blocks" not in layout:
+        raise RuntimeError("세그멘테이션 결과 형식이 올바르지 않습니다. {'blocks': [...]} 형식 필요")
+    out = {"layout": layout}
+    if check:
+        out["reuse_check"] = check
+    return out
+
+
+def _segment_params():
+    return {"reuse": DEDUP_REUSE, "confirm_ratio": DEDUP_CONFIRM_RATIO, "probes": DEDUP_PROBES}
+
+
+def _segment_code():
+    from services import segment
+    return [segment.segment_layout, segment.segment_layout_array, segment._opencv_layout_tables,
+            segment.scale_layout, _reuse_source, _dedup_matches, _probe_lines, _confirm_reuse]
+
+
+def _text_boxes(layout: dict, W: int, H: int) -> Dict[str, List[int]]:
+    """텍스트 블록 번호(str) → 클램핑된 bbox"""
+    out = {}
+    for idx, b in enumerate(layout["blocks"], start=1):
+        typ = (b.get("type") or b.get("cls") or "").lower()
+        bbox = b.get("bbox") or b.get("box") or b.get("poly")
+        if typ != "text" or not bbox or len(bbox) < 4:
+            continue
+        x1, y1, x2, y2 = map(int, bbox[:4])
+        out[str(idx)] = [max(0, x1), max(0, y1), min(W - 1, x2), min(H - 1, y2)]
+    return out
+
+
+def _reuse_region_ocr(boxes: Dict[str, List[int]], layout: dict, inputs):
+    """
+    일치 문서의 영역 OCR 재사용 — segment가 확인 OCR을 통과해 레이아웃을 빌린 경우만(reused_from).
+    단어 박스는 현재 페이지 좌표로 환산
+    """
+    if not layout.get("reused_from"):
+        return None
+    src = _reuse_source(inputs, [{"doc_key": layout["reused_from"]}], "region_ocr")
+    if not src:
+        return None
+    prev = src["out"]["blocks"]
+    sx, sy = src["sx"], src["sy"]
+    out = {}
+    for k in boxes:
+        if k in prev:
+            item = dict(prev[k])
+            if "words" in item:
+                item["words"] = [[int(w[0] * sx), int(w[1] * sy), int(w[2] * sx), int(w[3] * sy), *w[4:]]
+                                 for w in item["words"]]
+            out[k] = item
+    return {"blocks": out, "reused_from": src["doc_key"]}
+
+
+def _region_ocr(ctx, inputs):
+    from services.ocr_service import ocr_text_region, detect_page_script
+    from services import page_buffer
+    page = _page(ctx, inputs)
+    H, W = page.shape[:2]
+    p = ctx["stage_params"]
+    layout = inputs["segment"]["layout"]
+    boxes = _text_boxes(layout, W, H)
+    reused = _reuse_region_ocr(boxes, layout, inputs)
+    if reused:
+        return reused
+    out = {}
+    kw = dict(lang=p["lang"], normalize=False, geometry=True)
+    script = None
+    if p["lang"] == "auto" and p["detect"] == "page" and boxes:
+        # 스크립트/방향은 페이지당 1회 감지 → 모든 블록에 같은 lang/rotate
+        script = detect_page_script(page)
+        kw.update(lang=script["lang"], rotate=script["rotate"])
+    pool = page_buffer.page_pool() if len(boxes) > 1 else None
+    if pool is None:
+        for k, box in boxes.items():
+            try:
+                out[k] = ocr_text_region(page, box, **kw)
+            except Exception as e:
+                out[k] = {"error": str(e)}
+        return {"blocks": out, "script": script}
+
+    # PAGE_WORKERS>0: 페이지를 공유 메모리에 1회 올리고 워커에는 핸들만 전달
+    with page_buffer.pages.lease(page) as handle:
+        futs = {k: pool.submit(page_buffer.run_region_ocr, handle, box, **kw) for k, box in boxes.items()}
+        for k, fut in futs.items():
+            try:
+                out[k] = fut.result()
+            except Exception as e:
+                out[k] = {"error": str(e)}
+    return {"blocks": out, "script": script}
+
+
+def _region_ocr_params():
+    from services import ocr_service as OCR
+    return {
+        "lang": "auto",
+        "detect": OCR.OCR_DETECT,
+        "psms": [6],
+        "timeout": 60,
+        "paddle_backend": OCR.PADDLE_BACKEND,
+        "ensemble": OCR.OCR_ENSEMBLE,
+        "line_conf_threshold": OCR.LINE_CONF_THRESHOLD,
+        "dedup_reuse": DEDUP_REUSE,
+        # 엔진 구성이 바뀌면(설치/제거) 재계산
+        "engines": {"paddle": OCR._HAS_PADDLE, "easyocr": OCR._HAS_EASYOCR, "onnx": OCR._HAS_ONNX},
+    }
+
+
+def _region_ocr_code():
+    from services import ocr_service as OCR
+    return [OCR.ocr_text_region, OCR.ocr_best, OCR.detect_script, OCR.detect_page_script, OCR._ocr_with_conf_tesseract,
+            OCR._ocr_with_paddle, OCR._ocr_with_onnx, OCR._ocr_with_easyocr, OCR._parse_paddle_result,
+            OCR._tesseract_lines, OCR._ocr_line_ensemble, OCR._tesseract_word_boxes,
+            OCR._quad_bbox, OCR._unrotate_boxes, _text_boxes, _reuse_region_ocr, _page]
+
+
+def _geometry(ctx, inputs):
+    """블록별 단어/줄 박스 → 컬럼형 바이너리(words.wgeo) + 공간 인덱스용"""
+    from utils.word_geometry import WordGeometry
+    blocks = {k: v.get("words") or [] for k, v in inputs["region_ocr"]["blocks"].items()}
+    geo = WordGeometry.from_blocks(blocks)
+    out = Path(ctx["doc_dir"]) / "words.wgeo"
+    size = geo.save(out)
+    return {"path": _rel(out), "count": len(geo), "bytes": size, "sha256": _sha256(out.read_bytes())}
+
+
+def _geometry_code():
+    from utils import word_geometry as WG
+    return [WG.WordGeometry]
+
+
+def _postprocess(ctx, inputs):
+    from utils.text_cleaner import normalize_ocr_texts
+    items = inputs["region_ocr"]["blocks"]
+    keys = [k for k, v in items.items() if "text" in v]
+    texts = normalize_ocr_texts(items[k]["text"] for k in keys)
+    return {"blocks": {k: (t or NO_TEXT) for k, t in zip(keys, texts)}}
+
+
+def _postprocess_code():
+    from utils import text_cleaner as TC
+    return [TC.normalize_ocr_text, TC.normalize_ocr_texts, TC._postprocess_lines, TC.clean_ocr_text]
+
+
+def _overlay(ctx, inputs):
+    import cv2
+    from services.visualize import render_overlay
+    layout = inputs["segment"]["layout"]
+    bgr = _page(ctx, inputs).copy()      # 그리기용 사본
+    H, W = bgr.shape[:2]
+    stem = Path(ctx["filename"]).stem
+    tag = ctx["doc_key"][:8]
+
+    # 표 썸네일(오버레이 그리기 전 원본에서 자름)
+    tables = {}
+    for idx, b in enumerate(layout["blocks"], start=1):
+        if (b.get("type") or b.get("cls") or "").lower() != "table":
+            continue
+        x1, y1, x2, y2 = map(int, b["bbox"][:4])
+        crop = bgr[max(0, y1):min(H - 1, y2), max(0, x1):min(W - 1, x2)]
+        if crop.size:
+            name = f"{stem}_{tag}_t{idx}.png"
+            cv2.imwrite(str(BASE_DIR / "captures" / "tables" / name), crop)
+            tables[str(idx)] = f"/captures/tables/{name}"
+
+    overlay_name = f"{stem}_{tag}_overlay.png"
+    cv2.imwrite(str(BASE_DIR / "captures" / overlay_name), render_overlay(bgr, layout))
+    return {"overlay_name": overlay_name, "tables": tables}
+
+
+def _overlay_code():
+    from services import visualize
+    return [visualize.render_overlay, visualize._draw_label_with_bg]
+
+
+def _persist(ctx, inputs):
+    from db import SessionLocal
+    from crud import create_full_record, update_full_record
+
+    layout = json.loads(json.dumps(inputs["segment"]["layout"]))
+    raw_ocr = inputs["region_ocr"]["blocks"]
+    texts = inputs["postprocess"]["blocks"]
+    ov = inputs["overlay"]
+    for idx, b in enumerate(layout["blocks"], start=1):
+        k = str(idx)
+        if k in texts:
+            b["ocr"] = {"text": texts[k], "meta": raw_ocr[k].get("meta", {})}
+        elif "error" in raw_ocr.get(k, {}):
+            b["ocr_error"] = raw_ocr[k]["error"]
+        if k in ov["tables"]:
+            b.setdefault("table", {})["image_url"] = ov["tables"][k]
+            if b.get("content") is not None:
+                b["table"]["raw"] = b["content"]
+
+    overlay_url = f"/captures/{ov['overlay_name']}"
+    fields = dict(
+        raw_text="(세그멘테이션 결과: 영역별 OCR 포함, 표 썸네일 생성)",
+        tier="layout",
+        parsed={"layout": layout, "overlay_url": overlay_url, "source_png": inputs["rasterize"]["png"],
+                "geometry": inputs["geometry"]["path"], "duplicates": _dedup_matches(ctx, inputs)},
+        seg_json=layout,
+        vis_path=ov["overlay_name"],
+    )
+    # 이 문서를 가리키는 레코드 전부 갱신(각자 자기 업로드 파일명 유지, 삭제된 레코드는 목록에서 뺌)
+    db = SessionLocal()
+    try:
+        records = []
+        for r in ctx["records"]:
+            if update_full_record(db, r["id"], filename=r["filename"] or ctx["filename"], **fields) is not None:
+                records.append(r)
+        rec_id = ctx.get("record_id")
+        if rec_id is None or all(r["id"] != rec_id for r in records):
+            upload = ctx.get("upload") or {}
+            target = {"filename": upload.get("filename") or ctx["filename"],
+                      "content_type": upload.get("content_type") or ctx["content_type"]}
+            rec = update_full_record(db, rec_id, filename=target["filename"], **fields) if rec_id else None
+            if rec is None:
+                fields["ocr_text"] = fields.pop("raw_text")
+                rec = create_full_record(
+                    db,
+                    score=0,
+                    filename=target["filename"],
+                    ocr_json_path=_rel(Path(ctx["doc_dir"]) / "manifest.json"),
+                    **fields,
+                )
+            rec_id = rec.id
+            records.append({"id": rec_id, **target})
+        return {"record_id": rec_id, "records": records, "overlay_url": overlay_url}
+    finally:
+        db.close()
+
+
+STAGES: List[Stage] = [
+    Stage("ingest", "2", [], _ingest),
+    Stage("rasterize", "1", ["ingest"], _rasterize, _rasterize_params),
+    Stage("dedup", "2", ["rasterize"], _dedup, _dedup_params, code=_dedup_code),
+    Stage("segment", "1", ["rasterize", "dedup"], _segment, _segment_params, _segment_code),
+    Stage("region_ocr", "2", ["rasterize", "segment", "dedup"], _region_ocr, _region_ocr_params, _region_ocr_code),
+    Stage("geometry", "1", ["region_ocr"], _geometry, code=_geometry_code),
+    Stage("postprocess", "1", ["region_ocr"], _postprocess, code=_postprocess_code),
+    Stage("overlay", "1", ["rasterize", "segment"], _overlay, code=_overlay_code),
+    Stage("persist", "4", ["ingest", "rasterize", "dedup", "segment", "region_ocr", "postprocess", "overlay", "geometry"],
+          _persist),
+]
+STAGE_NAMES = [s.name for s in STAGES]
+
+
+# ================= 매니페스트 =================
+def _manifest_path(doc_dir: Path) -> Path:
+    return doc_dir / "manifest.json"
+
+
+def load_manifest(doc_dir: Path) -> Dict[str, Any]:
+    p = _manifest_path(doc_dir)
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+
+
+def _save_manifest(doc_dir: Path, manifest: Dict[str, Any]) -> None:
+    # 웹(업로드)과 워커/재처리가 같은 문서를 동시에 쓸 수 있으므로 임시 파일은 쓰는 쪽마다 따로
+    tmp = doc_dir / f"manifest.{os.getpid()}.{threading.get_ident()}.tmp"
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, _manifest_path(doc_dir))
+
+
+def manifest_records(manifest: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """문서를 가리키는 레코드 목록 [{"id", "filename", "content_type"}] (예전 매니페스트의 record_id 하나도 변환)"""
+    if "records" in manifest:
+        return list(manifest["records"])
+    rid = manifest.get("record_id")
+    if rid is None:
+        return []
+    return [{"id": rid, "filename": manifest.get("filename"), "content_type": manifest.get("content_type")}]
+
+
+def _merge_records(doc_dir: Path, records: List[Dict[str, Any]],
+                   dropped: set | None = None) -> List[Dict[str, Any]]:
+    """저장 직전 최신 매니페스트의 레코드 목록과 합침(그 사이 다른 프로세스가 등록한 레코드를 덮어쓰지 않게)"""
+    merged = {r["id"]: r for r in manifest_records(load_manifest(doc_dir)) if r["id"] not in (dropped or ())}
+    merged.update({r["id"]: r for r in records})
+    return sorted(merged.values(), key=lambda r: r["id"])
+
+
+def register_record(doc_dir: Path, record_id: int, filename: str, content_type: str | None = None) -> None:
+    """레코드를 문서의 레코드 목록에 추가(큐 업로드의 placeholder, bootstrap 레코드)"""
+    manifest = load_manifest(doc_dir)
+    manifest["records"] = _merge_records(doc_dir, [{"id": record_id, "filename": filename,
+                                                    "content_type": content_type}])
+    manifest["record_id"] = record_id
+    _save_manifest(doc_dir, manifest)
+
+
+def ingest_bytes(raw: bytes, filename: str, content_type: str | None = None,
+                 record_id: int | None = None, source_ext: str | None = None) -> Path:
+    """
+    원본을 artifacts/<sha256 앞 16자>/ 에 저장하고 문서 디렉터리 반환.
+    같은 바이트가 다른 이름으로 다시 올라와도 source/filename(산출물 이름용)은 처음 것을 유지
+    """
+    key = _sha256(raw)[:16]
+    doc_dir = ARTIFACT_DIR / key
+    doc_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(doc_dir)
+    source_name = manifest.get("source_name")
+    if not source_name or not (doc_dir / source_name).exists():
+        # 확장자: 파일명 → content_type 순(형식 판별은 저장본 확장자로 하므로 PDF 등이 .bin이 되지 않게)
+        ext = (source_ext or Path(filename or "").suffix.lower()
+               or mimetypes.guess_extension(content_type or "") or ".bin")
+        source_name = f"source{ext}"
+        (doc_dir / source_name).write_bytes(raw)
+
+    manifest.update({"doc_key": key, "source_name": source_name})
+    manifest.setdefault("filename", filename)
+    manifest.setdefault("content_type", content_type or mimetypes.guess_type(filename or "")[0])
+    manifest.setdefault("stages", {})
+    _save_manifest(doc_dir, manifest)
+    if record_id is not None:
+        register_record(doc_dir, record_id, filename, content_type)
+    return doc_dir
+
+
+# ================= 실행 =================
+def plan(doc_dir: Path, force: str | None = None) -> List[str]:
+    """
+    재계산이 필요한 스테이지 목록(실행 없이 판단).
+    상위 스테이지가 재계산 대상이면 산출물 변화 여부를 알 수 없으므로 하위도 포함.
+    """
+    manifest = load_manifest(doc_dir)
+    done = manifest.get("stages", {})
+    forced = set(STAGE_NAMES[STAGE_NAMES.index(force):]) if force else set()
+    stale: List[str] = []
+    for st in STAGES:
+        prev = done.get(st.name)
+        if st.name in forced or not prev or any(d in stale for d in st.deps):
+            stale.append(st.name)
+            continue
+        fp = st.fingerprint({d: done[d]["out_hash"] for d in st.deps})
+        if prev.get("fp") != fp or not (doc_dir / prev["output"]).exists():
+            stale.append(st.name)
+    return stale
+
+
+def run_stages(doc_dir: Path, force: str | None = None, record_id: int | None = None,
+               upload: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    """
+    문서 하나의 DAG 실행. 반환: {"doc_key", "record_id", "record_ids", "ran": [...], "skipped": [...]}
+    - persist는 매니페스트 records의 레코드 전부를 갱신(같은 바이트의 업로드마다 레코드가 따로 있음)
+    - record_id: persist가 채울 레코드(큐 작업의 placeholder). 나머지 산출물은 재사용하고 persist는 항상 실행
+    - upload: 이번 업로드({"filename", "content_type"}). 주어지면 이 업로드의 레코드를 새로 만들도록 persist 실행
+      (같은 바이트면 ingest~overlay 산출물은 재사용, 새 레코드의 파일명은 이번 업로드 것)
+    """
+    doc_dir = Path(doc_dir)
+    manifest = load_manifest(doc_dir)
+    done = manifest.setdefault("stages", {})
+    forced = set(STAGE_NAMES[STAGE_NAMES.index(force):]) if force else set()
+    if upload is not None or record_id is not None:
+        forced.add("persist")
+    manifest["records"] = manifest_records(manifest)
+    dropped: set = set()
+    ctx: Dict[str, Any] = {
+        "doc_dir": str(doc_dir),
+        "doc_key": manifest["doc_key"],
+        "filename": manifest["filename"],
+        "content_type": manifest.get("content_type"),
+        "source_name": manifest["source_name"],
+        "record_id": record_id if record_id is not None else (None if upload else manifest.get("record_id")),
+        "records": manifest["records"],
+        "upload": upload,
+    }
+    outputs: Dict[str, Any] = {}
+    ran, skipped = [], []
+
+    for st in STAGES:
+        fp = st.fingerprint({d: done[d]["out_hash"] for d in st.deps})
+        prev = done.get(st.name)
+        out_file = doc_dir / f"{st.name}.json"
+        if prev and prev.get("fp") == fp and out_file.exists() and st.name not in forced:
+            outputs[st.name] = json.loads(out_file.read_text(encoding="utf-8"))
+            skipped.append(st.name)
+            continue
+
+        ctx["stage_params"] = st.params()
+        out = st.run(ctx, {d: outputs[d] for d in st.deps})
+        out_file.write_text(json.dumps(out, ensure_ascii=False), encoding="utf-8")
+        outputs[st.name] = out
+        done[st.name] = {
+            "fp": fp,
+            "out_hash": _json_hash(out),
+            "output": out_file.name,
+            "version": st.version,
+            "code": st.code_hash(),
+            "at": datetime.now().isoformat(timespec="seconds"),
+        }
+        ran.append(st.name)
+        if st.name == "persist":
+            dropped = {r["id"] for r in ctx["records"]} - {r["id"] for r in out["records"]}
+            manifest["records"] = out["records"]
+            manifest["record_id"] = ctx["record_id"] = out["record_id"]
+        manifest["records"] = _merge_records(doc_dir, manifest["records"], dropped)
+        _save_manifest(doc_dir, manifest)
+
+    return {"doc_key": ctx["doc_key"], "record_id": ctx["record_id"],
+            "record_ids": [r["id"] for r in manifest["records"]], "ran": ran, "skipped": skipped}
+
+
+def run_pipeline(raw: bytes, filename: str, content_type: str | None = None) -> Dict[str, Any]:
+    """업로드 1건 처리 → 새 레코드(동일 바이트 재업로드 시 OCR 등 산출물은 재사용)"""
+    return run_stages(ingest_bytes(raw, filename, content_type),
+                      upload={"filename": filename, "content_type": content_type})
+
+
+# ================= 아카이브 재처리 =================
+def enqueue_upload(db, raw: bytes, filename: str, content_type: str | None = None) -> Dict[str, Any]:
+    """
+    큐 모드 업로드: 원본만 아카이브에 넣고 placeholder 레코드(tier="queued") + ocr_jobs 적재.
+    실제 처리는 python -m services.worker 가 run_stages(record_id=작업의 레코드)로 수행 → persist가 그 레코드를 채움.
+    placeholder는 매니페스트 records에 자기 파일명으로 등록(같은 바이트가 여러 번 올라와도 작업마다 자기 레코드를 채움)
+    """
+    from crud import create_full_record, enqueue_job
+
+    doc_dir = ingest_bytes(raw, filename, content_type)
+    rec = create_full_record(
+        db,
+        filename=filename,
+        ocr_text="(처리 대기 중)",
+        parsed={},
+        seg_json={},
+        tier="queued",
+        ocr_json_path=_rel(_manifest_path(doc_dir)),
+    )
+    register_record(doc_dir, rec.id, filename, content_type)
+    job = enqueue_job(db, doc_dir=str(doc_dir), record_id=rec.id)
+    return {"doc_key": doc_dir.name, "record_id": rec.id, "job_id": job.id}
+
+
+def iter_documents(record_ids: List[int] | None = None) -> List[Path]:
+    if not ARTIFACT_DIR.exists():
+        return []
+    docs = sorted(p.parent for p in ARTIFACT_DIR.glob("*/manifest.json"))
+    if record_ids:
+        wanted = set(record_ids)
+        docs = [d for d in docs if any(r["id"] in wanted for r in manifest_records(load_manifest(d)))]
+    return docs
+
+
+def _worker_init() -> None:
+    # fork로 물려받은 DB 커넥션은 부모 것이므로 닫지 않고 버린다(close=False — 부모의 연결을 끊지 않게)
+    from db import engine
+    from services import page_buffer
+    engine.dispose(close=False)
+    # 문서 단위로 이미 병렬 → 문서 안 블록 OCR은 프로세스 풀을 중첩하지 않음
+    page_buffer.PAGE_WORKERS = 0
+
+
+def _reprocess_one(doc_dir: str, force: str | None) -> Dict[str, Any]:
+    try:
+        return run_stages(Path(doc_dir), force=force)
+    except Exception as e:
+        return {"doc_key": Path(doc_dir).name, "error": f"{type(e).__name__}: {e}"}
+
+
+def reprocess(record_ids: List[int] | None = None, force: str | None = None,
+              workers: int = 1, dry_run: bool = False) -> List[Dict[str, Any]]:
+    """아카이브 전체(또는 지정 레코드)를 변경된 스테이지만 재계산"""
+    docs = iter_documents(record_ids)
+    if dry_run:
+        return [{"doc_key": d.name, "record_ids": [r["id"] for r in manifest_records(load_manifest(d))],
+                 "stale": plan(d, force)} for d in docs]
+    if workers <= 1:
+        return [_reprocess_one(str(d), force) for d in docs]
+    from services import page_buffer
+    results = []
+    # 웹 서버(스레드 多)에서 불려도 안전하게 페이지 풀과 같은 시작 방식(기본 spawn) 사용
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context(page_buffer.PAGE_MP_START),
+                             initializer=_worker_init) as pool:
+        futs = [pool.submit(_reprocess_one, str(d), force) for d in docs]
+        for fut in as_completed(futs):
+            results.append(fut.result())
+    return results
+
+
+def bootstrap_from_db(limit: int | None = None) -> int:
+    """파이프라인 도입 전 레코드(parsed.source_png 보유)를 아카이브에 등록"""
+    from db import SessionLocal
+    from models import OCRRecord
+
+    db = SessionLocal()
+    n = 0
+    try:
+        q = db.query(OCRRecord).filter(OCRRecord.ocr_json_path.is_(None)).order_by(OCRRecord.id)
+        for rec in (q.limit(limit) if limit else q):
+            try:
+                parsed = json.loads(rec.parsed or "{}")
+            except ValueError:
+                continue
+            src = parsed.get("source_png") if isinstance(parsed, dict) else None
+            if not src or not (BASE_DIR / src).exists():
+                continue
+            doc_dir = ingest_bytes((BASE_DIR / src).read_bytes(), rec.filename, "image/png",
+                                   record_id=rec.id, source_ext=".png")
+            rec.ocr_json_path = _rel(_manifest_path(doc_dir))
+            n += 1
+        db.commit()
+    finally:
+        db.close()
+    return n
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m services.pipeline")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("reprocess", help="변경된 스테이지만 재계산")
+    r.add_argument("--ids", type=int, nargs="*", help="레코드 id (기본: 전체)")
+    r.add_argument("--force", choices=STAGE_NAMES, help="이 스테이지부터 강제 재계산")
+    r.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    r.add_argument("--dry-run", action="store_true", help="재계산 대상만 출력")
+
+    b = sub.add_parser("bootstrap", help="기존 DB 레코드를 아카이브에 등록")
+    b.add_argument("--limit", type=int)
+
+    args = ap.parse_args(argv)
+    if args.cmd == "bootstrap":
+        print(f"등록: {bootstrap_from_db(args.limit)}건")
+        return 0
+
+    results = reprocess(args.ids, args.force, args.workers, args.dry_run)
+    failed = 0
+    for res in results:
+        if "error" in res:
+            failed += 1
+            print(f"❌ {res['doc_key']}: {res['error']}")
+        elif args.dry_run:
+            ids = ",".join(f"#{i}" for i in res["record_ids"]) or "-"
+            print(f"{res['doc_key']} ({ids}): {', '.join(res['stale']) or '-'}")
+        else:
+            ids = ",".join(f"#{i}" for i in res["record_ids"]) or "-"
+            print(f"✅ {res['doc_key']} ({ids}): ran={','.join(res['ran']) or '-'}")
+    print(f"문서 {len(results)}건, 실패 {failed}건")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,12 +21,8 @@ def _opencv_layout_tables(img):
         blocks.append({"id": f"t{x}_{y}", "type": "table", "bbox": [x, y, x+bw, y+bh], "content": None})
     return blocks
 
-def segment_layout(img_path: str) -> dict:
-    if not os.path.exists(img_path):
-        raise FileNotFoundError(img_path)
-    img = cv2.imread(img_path)
-    if img is None:
-        raise ValueError(f"이미지를 읽을 수 없습니다: {img_path}")
+def segment_layout_array(img) -> dict:
+    """이미 디코딩된 BGR 배열에 대해 레이아웃 분석(파일 I/O 없음)"""
     h, w = img.shape[:2]
 
     # 테이블 후보 추정
@@ -37,3 +33,28 @@ def segment_layout(img_path: str) -> dict:
     blocks.extend(table_blocks)
 
     return {"engine": "opencv-only", "width": w, "height": h, "blocks": blocks}
+
+def segment_layout(img_path: str) -> dict:
+    if not os.path.exists(img_path):
+        raise FileNotFoundError(img_path)
+    img = cv2.imread(img_path)
+    if img is None:
+        raise ValueError(f"이미지를 읽을 수 없습니다: {img_path}")
+    return segment_layout_array(img)
+
+def scale_layout(layout: dict, sx: float, sy: float) -> dict:
+    """축소 이미지 기준 레이아웃을 원본 좌표로 환산한 사본 반환(id는 원본 좌표 기준으로 갱신)"""
+    W = int(round(layout["width"] * sx))
+    H = int(round(layout["height"] * sy))
+    blocks = []
+    for b in layout.get("blocks", []):
+        nb = dict(b)
+        x1, y1, x2, y2 = b["bbox"][:4]
+        nb["bbox"] = [
+            max(0, int(round(x1 * sx))), max(0, int(round(y1 * sy))),
+            min(W, int(round(x2 * sx))), min(H, int(round(y2 * sy))),
+        ]
+        if nb.get("type") == "table":
+            nb["id"] = f"t{nb['bbox'][0]}_{nb['bbox'][1]}"
+        blocks.append(nb)
+    return {**layout, "width": W, "height": H, "blocks": blocks}
@@ -0,0 +1,163 @@
+# services/tiles.py
+"""
+페이지 이미지 → 다해상도 타일 피라미드(딥줌). 요청된 타일만 그때그때 만들고 디스크에 캐시.
+
+- 레벨 z: 원본을 2^z 배 축소(z=0이 원본), 최상위 레벨은 한 변이 TILE_SIZE 이하
+- 타일: captures/pyramid/<key>/<z>/<x>_<y>.<ext>
+  key = 원본 경로 + mtime + 크기 해시 → 원본이 바뀌면 새 key(이전 캐시는 그대로 무효)
+- 디코딩/축소한 레벨 이미지는 메모리 LRU(TILE_CACHE_MB)로 재사용
+- 레이아웃 박스는 이미지에 그리지 않음(클라이언트가 seg_json으로 벡터 렌더)
+"""
+from __future__ import annotations
+
+import hashlib, math, os, threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+TILE_DIR = BASE_DIR / "captures" / "pyramid"
+TILE_SIZE = int(os.getenv("TILE_SIZE", "256"))
+TILE_FORMAT = os.getenv("TILE_FORMAT", "jpg").lower()      # jpg | png | webp
+TILE_QUALITY = int(os.getenv("TILE_QUALITY", "85"))
+TILE_CACHE_MB = int(os.getenv("TILE_CACHE_MB", "256"))      # 레벨 이미지 메모리 캐시 상한
+
+_MEDIA = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp"}
+
+
+class _LevelCache:
+    """(key, z) → BGR 배열, 바이트 기준 LRU"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.items: "OrderedDict[Tuple[str, int], np.ndarray]" = OrderedDict()
+        self.nbytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, k):
+        with self.lock:
+            arr = self.items.get(k)
+            if arr is not None:
+                self.items.move_to_end(k)
+            return arr
+
+    def put(self, k, arr) -> None:
+        with self.lock:
+            if k in self.items:
+                return
+            self.items[k] = arr
+            self.nbytes += arr.nbytes
+            while self.nbytes > self.max_bytes and len(self.items) > 1:
+                _, old = self.items.popitem(last=False)
+                self.nbytes -= old.nbytes
+
+
+_levels = _LevelCache(TILE_CACHE_MB * 1024 * 1024)
+
+
+class TilePyramid:
+    def __init__(self, src: str | Path, tile_size: int = TILE_SIZE, fmt: str = TILE_FORMAT):
+        self.src = Path(src)
+        if not self.src.exists():
+            raise FileNotFoundError(str(self.src))
+        st = self.src.stat()
+        with Image.open(self.src) as im:      # 헤더만 읽음
+            self.width, self.height = im.size
+        self.tile_size = tile_size
+        self.fmt = fmt if fmt in _MEDIA else "jpg"
+        self.key = hashlib.sha1(
+            f"{self.src.resolve()}:{st.st_mtime_ns}:{st.st_size}:{tile_size}:{self.fmt}".encode()
+        ).hexdigest()[:16]
+        self.max_level = max(0, math.ceil(math.log2(max(self.width, self.height) / tile_size)))
+        self.dir = TILE_DIR / self.key
+        self._lock = threading.Lock()
+
+    @property
+    def media_type(self) -> str:
+        return _MEDIA[self.fmt]
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "width": self.width,
+            "height": self.height,
+            "tile_size": self.tile_size,
+            "max_level": self.max_level,
+            "format": self.fmt,
+        }
+
+    def level_size(self, z: int) -> Tuple[int, int]:
+        f = 2 ** z
+        return max(1, math.ceil(self.width / f)), max(1, math.ceil(self.height / f))
+
+    def _level(self, z: int) -> np.ndarray:
+        arr = _levels.get((self.key, z))
+        if arr is not None:
+            return arr
+        if z == 0:
+            arr = cv2.imdecode(np.fromfile(str(self.src), dtype=np.uint8), cv2.IMREAD_COLOR)
+            if arr is None:
+                raise ValueError(f"이미지 로드 실패: {self.src}")
+        else:
+            # 바로 위(더 큰) 레벨이 캐시에 있으면 그걸 절반으로, 없으면 원본에서 축소
+            finer = _levels.get((self.key, z - 1))
+            base = finer if finer is not None else self._level(0)
+            arr = cv2.resize(base, self.level_size(z), interpolation=cv2.INTER_AREA)
+        _levels.put((self.key, z), arr)
+        return arr
+
+    def tile_path(self, z: int, x: int, y: int) -> Path:
+        """타일 파일 경로(없으면 생성). 범위 밖이면 ValueError"""
+        if not 0 <= z <= self.max_level:
+            raise ValueError("level out of range")
+        lw, lh = self.level_size(z)
+        T = self.tile_size
+        if not (0 <= x < math.ceil(lw / T) and 0 <= y < math.ceil(lh / T)):
+            raise ValueError("tile out of range")
+
+        out = self.dir / str(z) / f"{x}_{y}.{self.fmt}"
+        if out.exists():
+            return out
+        with self._lock:
+            if out.exists():
+                return out
+            tile = self._level(z)[y * T:(y + 1) * T, x * T:(x + 1) * T]
+            params = []
+            if self.fmt == "jpg":
+                params = [cv2.IMWRITE_JPEG_QUALITY, TILE_QUALITY]
+            elif self.fmt == "webp":
+                params = [cv2.IMWRITE_WEBP_QUALITY, TILE_QUALITY]
+            ok, buf = cv2.imencode(f".{self.fmt}", tile, params)
+            if not ok:
+                raise RuntimeError("타일 인코딩 실패")
+            out.parent.mkdir(parents=True, exist_ok=True)
+            tmp = out.with_suffix(".tmp")
+            tmp.write_bytes(buf.tobytes())
+            os.replace(tmp, out)
+        return out
+
+
+_pyramids: "OrderedDict[str, TilePyramid]" = OrderedDict()
+_pyramids_lock = threading.Lock()
+
+
+def get_pyramid(src: str | Path) -> TilePyramid:
+    """원본 경로 → TilePyramid(원본이 바뀌면 새로 생성)"""
+    p = TilePyramid(src)
+    with _pyramids_lock:
+        cached = _pyramids.get(p.key)
+        if cached is None:
+            _pyramids[p.key] = cached = p
+            while len(_pyramids) > 256:
+                _pyramids.popitem(last=False)
+        return cached
+
+
+def pyramid_by_key(key: str) -> TilePyramid | None:
+    """get_pyramid로 이미 연 피라미드(프로세스 메모리) 조회"""
+    with _pyramids_lock:
+        return _pyramids.get(key)
@@ -39,28 +39,18 @@ def _draw_label_with_bg(img, x: int, y: int, text: str, bg_color: Tuple[int, int
     cv2.putText(img, text, (x + 3, y - 6), cv2.FONT_HERSHEY_SIMPLEX, font_scale,
                 (255, 255, 255), thickness, cv2.LINE_AA)
 
-def save_overlay(
-    img_path: str,
+def render_overlay(
+    img,
     layout_json: Dict[str, Any],
-    out_path: str,
     thickness: int = 2,
     font_scale: float = 0.6,
     min_area: int = 0,  # 너무 작은 박스는 스킵 (픽셀^2)
-) -> str:
+):
     """
-    문서 레이아웃 결과(JSON)를 이미지에 오버레이하여 저장.
-    - img_path: 원본 이미지 경로
+    BGR 배열 위에 레이아웃 박스/라벨을 그려서 반환(제자리 수정, 파일 I/O 없음).
     - layout_json: {"blocks":[{"type":str,"bbox":[x1,y1,x2,y2], "score":float?}, ...]} 형태 권장
                    (리스트 그대로 넘겨도 되고, 키 이름이 다르면 'bbox'/'box' fallback)
-    - out_path: 저장 경로
-    - thickness/font_scale: 시각화 파라미터
-    - min_area: 최소 면적(너무 작은 박스 suppression)
     """
-    _ensure_dir(os.path.dirname(out_path))
-
-    img = cv2.imread(img_path)
-    if img is None:
-        raise ValueError(f"이미지를 읽을 수 없습니다: {img_path}")
     H, W = img.shape[:2]
 
     # blocks 확보: dict 또는 list 모두 대응
@@ -99,5 +89,30 @@ def save_overlay(
 
         _draw_label_with_bg(img, x1, y1, label, color, font_scale, thickness)
 
+    return img
+
+def save_overlay(
+    img_path: str,
+    layout_json: Dict[str, Any],
+    out_path: str,
+    thickness: int = 2,
+    font_scale: float = 0.6,
+    min_area: int = 0,  # 너무 작은 박스는 스킵 (픽셀^2)
+) -> str:
+    """
+    문서 레이아웃 결과(JSON)를 이미지에 오버레이하여 저장.
+    - img_path: 원본 이미지 경로
+    - layout_json: render_overlay 참고
+    - out_path: 저장 경로
+    - thickness/font_scale: 시각화 파라미터
+    - min_area: 최소 면적(너무 작은 박스 suppression)
+    """
+    _ensure_dir(os.path.dirname(out_path))
+
+    img = cv2.imread(img_path)
+    if img is None:
+        raise ValueError(f"이미지를 읽을 수 없습니다: {img_path}")
+
+    render_overlay(img, layout_json, thickness, font_scale, min_area)
     cv2.imwrite(out_path, img)
     return out_path
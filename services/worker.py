@@ -0,0 +1,136 @@
+# services/worker.py — DB 큐(ocr_jobs) 기반 독립 OCR 워커
+"""
+웹 서버와 분리된 프로세스에서 업로드 문서를 처리한다(PIPELINE_MODE=queue).
+
+- 선점: MySQL/PostgreSQL은 SELECT ... FOR UPDATE SKIP LOCKED, SQLite는 조건부 UPDATE
+- 임대(lease): 선점 시 lease_expires_at 설정, 실행 중에는 하트비트 스레드가 주기적으로 연장
+- 크래시 복구: 임대가 만료된 running 작업은 다른 워커가 다시 가져감(attempts < max_attempts)
+- 처리: services.pipeline.run_stages → persist 스테이지가 OCRRecord(placeholder)를 갱신
+
+CLI)
+    python -m services.worker                  # 계속 폴링
+    python -m services.worker --once           # 대기 작업을 다 처리하면 종료
+    python -m services.worker --lease 300 --poll 1.0 --id ocr-1
+"""
+from __future__ import annotations
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse, signal, socket, threading, time, traceback
+from pathlib import Path
+
+from db import SessionLocal, init_job_schema
+from crud import claim_job, heartbeat_job, finish_job
+from services import pipeline
+
+LEASE_SECONDS = int(os.getenv("WORKER_LEASE_S", "120"))
+POLL_SECONDS = float(os.getenv("WORKER_POLL_S", "2.0"))
+
+
+class _Heartbeat(threading.Thread):
+    """임대 연장 스레드 — 자체 세션 사용(메인 스레드 세션과 공유하지 않음)"""
+
+    def __init__(self, job_id: int, worker_id: str, lease_s: int):
+        super().__init__(daemon=True)
+        self.job_id, self.worker_id, self.lease_s = job_id, worker_id, lease_s
+        self.stop_event = threading.Event()
+        self.lost = False
+
+    def run(self) -> None:
+        interval = max(1.0, self.lease_s / 3)
+        while not self.stop_event.wait(interval):
+            db = SessionLocal()
+            try:
+                if not heartbeat_job(db, self.job_id, self.worker_id, self.lease_s):
+                    self.lost = True
+                    print(f"⚠️ job #{self.job_id}: 임대를 잃음(다른 워커가 선점)")
+                    return
+            except Exception as e:
+                print(f"⚠️ job #{self.job_id}: 하트비트 실패 {type(e).__name__}: {e}")
+            finally:
+                db.close()
+
+
+class Worker:
+    def __init__(self, worker_id: str | None = None, lease_s: int = LEASE_SECONDS,
+                 poll_s: float = POLL_SECONDS):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_s = lease_s
+        self.poll_s = poll_s
+        self._stop = threading.Event()
+
+    def stop(self, *_args) -> None:
+        # 진행 중인 작업은 끝내고 종료
+        self._stop.set()
+
+    def run_one(self) -> bool:
+        """작업 1건 처리. 대기 작업이 없으면 False"""
+        db = SessionLocal()
+        try:
+            job = claim_job(db, self.worker_id, self.lease_s)
+            if job is None:
+                return False
+            job_id, doc_dir, force, record_id = job.id, job.doc_dir, job.force, job.record_id
+        finally:
+            db.close()
+
+        hb = _Heartbeat(job_id, self.worker_id, self.lease_s)
+        hb.start()
+        error = None
+        t0 = time.perf_counter()
+        try:
+            res = pipeline.run_stages(Path(doc_dir), force=force, record_id=record_id)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}"
+        finally:
+            hb.stop_event.set()
+            hb.join()
+
+        if hb.lost:
+            # 임대를 잃었으면 결과 기록은 새 소유자에게 맡김(산출물은 fingerprint로 재사용됨)
+            return True
+        db = SessionLocal()
+        try:
+            finish_job(db, job_id, self.worker_id, error)
+        finally:
+            db.close()
+        dt = time.perf_counter() - t0
+        if error:
+            print(f"❌ job #{job_id} ({dt:.1f}s): {error.splitlines()[0]}")
+        else:
+            print(f"✅ job #{job_id} → record #{res['record_id']} ({dt:.1f}s, ran={','.join(res['ran']) or '-'})")
+        return True
+
+    def run_forever(self, once: bool = False) -> int:
+        print(f"👷 worker {self.worker_id} 시작 (lease={self.lease_s}s, poll={self.poll_s}s)")
+        n = 0
+        while not self._stop.is_set():
+            if self.run_one():
+                n += 1
+                continue
+            if once:
+                break
+            self._stop.wait(self.poll_s)
+        print(f"👷 worker {self.worker_id} 종료 (처리 {n}건)")
+        return n
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m services.worker")
+    ap.add_argument("--id", dest="worker_id", help="워커 식별자(기본: 호스트:pid)")
+    ap.add_argument("--lease", type=int, default=LEASE_SECONDS, help="임대 시간(초)")
+    ap.add_argument("--poll", type=float, default=POLL_SECONDS, help="대기 작업이 없을 때 폴링 간격(초)")
+    ap.add_argument("--once", action="store_true", help="대기 작업을 모두 처리하면 종료")
+    args = ap.parse_args(argv)
+
+    init_job_schema()
+    w = Worker(args.worker_id, args.lease, args.poll)
+    signal.signal(signal.SIGTERM, w.stop)
+    signal.signal(signal.SIGINT, w.stop)
+    w.run_forever(once=args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,620 @@
+# utils/bench.py — OCR 파이프라인 오프라인 벤치마크 (FastAPI/DB 없이 실행)
+"""
+사용 예)
+    python -m utils.bench run captures --out bench.json
+    python -m utils.bench run captures --out bench.json --baseline bench_base.json
+    python -m utils.bench compare bench.json bench_base.json
+    python -m utils.bench text --lines 100000
+    python -m utils.bench backends captures --out backends.json
+    python -m utils.bench db --records 2000 --concurrency 32
+
+- 코퍼스 디렉터리의 이미지/PDF를 파일명 순서대로 처리(재현성)
+- 스테이지별 p50/p95 지연, 처리량(pages/s), 최대 RSS 기록
+- <stem>.gt.txt 또는 <stem>.txt 정답 텍스트가 있으면 엔진별 CER/정확도 측정
+- 결과 JSON을 기준(baseline) JSON과 비교해 회귀 여부 표시(회귀 시 exit code 1)
+- text: 후처리 마이크로 벤치마크(normalize_ocr_text 선형성 + 기존 경로와 출력 동일성)
+- backends: Paddle 백엔드(paddleocr vs ONNX Runtime) 지연/메모리 비교(백엔드별 별도 프로세스)
+- db: 레코드 저장 — 요청별 동기 커밋 vs write-behind 배치 (임시 SQLite 프로필)
+"""
+from __future__ import annotations
+
+import sys, os
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import argparse, json, platform, resource, subprocess, tempfile, time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BENCH_VERSION = 1
+CORPUS_EXTS = {".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp", ".heic", ".pdf"}
+STAGES = ("upload_ocr", "rasterize", "segment", "region_ocr", "overlay")
+
+_CTYPES = {
+    ".pdf": "application/pdf",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+}
+
+
+class _CorpusFile:
+    """UploadFile 대용(파이프라인이 쓰는 filename/content_type만 제공)"""
+
+    def __init__(self, path: Path):
+        self.filename = path.name
+        self.content_type = _CTYPES.get(path.suffix.lower(), "application/octet-stream")
+
+
+# ================= 통계 유틸 =================
+def _percentile(values: List[float], q: float) -> float:
+    """선형 보간 백분위수(q: 0~100)"""
+    if not values:
+        return 0.0
+    xs = sorted(values)
+    k = (len(xs) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(xs) - 1)
+    return xs[lo] + (xs[hi] - xs[lo]) * (k - lo)
+
+
+def _summary(ms: List[float]) -> Dict[str, float]:
+    return {
+        "n": len(ms),
+        "p50_ms": round(_percentile(ms, 50), 2),
+        "p95_ms": round(_percentile(ms, 95), 2),
+        "mean_ms": round(sum(ms) / len(ms), 2) if ms else 0.0,
+        "total_ms": round(sum(ms), 2),
+    }
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    if sys.platform == "darwin":
+        return round(rss / (1024 * 1024), 1)
+    return round(rss / 1024, 1)
+
+
+def _levenshtein(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        cur = [i]
+        for j, cb in enumerate(b, start=1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        prev = cur
+    return prev[-1]
+
+
+def _norm_for_cer(text: str) -> str:
+    # 공백 차이는 정확도에서 제외(엔진마다 띄어쓰기 정책이 다름)
+    return "".join((text or "").split())
+
+
+def char_error_rate(hyp: str, ref: str) -> float:
+    """문자 오류율(CER) = 편집거리 / 정답 길이"""
+    h, r = _norm_for_cer(hyp), _norm_for_cer(ref)
+    if not r:
+        return 0.0 if not h else 1.0
+    return _levenshtein(h, r) / len(r)
+
+
+@contextmanager
+def _scratch(OCR, prefix: str):
+    """
+    실행 1회용 임시 디렉터리. 업로드 PNG(OCR.UPLOAD_DIR)와 오버레이를 여기에 쓰고 끝나면 통째로 삭제
+    (벤치마크가 uploads/ 에 페이지 파일을 남기지 않도록)
+    """
+    prev = OCR.UPLOAD_DIR
+    with tempfile.TemporaryDirectory(prefix=prefix) as tmp:
+        OCR.UPLOAD_DIR = tmp
+        try:
+            yield Path(tmp)
+        finally:
+            OCR.UPLOAD_DIR = prev
+
+
+def _timed(bucket: List[float], fn: Callable, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    bucket.append((time.perf_counter() - t0) * 1000.0)
+    return out
+
+
+# ================= 코퍼스 =================
+def iter_corpus(root: Path, limit: int | None = None) -> List[Path]:
+    files = sorted(
+        p for p in root.rglob("*")
+        if p.is_file() and p.suffix.lower() in CORPUS_EXTS
+    )
+    return files[:limit] if limit else files
+
+
+def _ground_truth(path: Path) -> str | None:
+    for cand in (path.with_suffix(".gt.txt"), path.with_suffix(".txt")):
+        if cand.exists():
+            return cand.read_text(encoding="utf-8")
+    return None
+
+
+def _tesseract_version(OCR) -> str | None:
+    try:
+        return str(OCR.pytesseract.get_tesseract_version())
+    except Exception:
+        return None
+
+
+# ================= 실행 =================
+def run_benchmark(
+    corpus: Path,
+    engines: List[str] | None = None,
+    limit: int | None = None,
+    warmup: int = 0,
+    ensemble: str | None = None,
+) -> Dict[str, Any]:
+    """
+    코퍼스 전체를 run_ocr_on_upload / segment_layout / ocr_text_region / save_overlay 로 처리.
+    - Paddle/EasyOCR 미설치 시 해당 엔진은 자동 제외(Tesseract 단독 동작)
+    """
+    from services import ocr_service as OCR
+    from services.segment import segment_layout
+    from services.visualize import save_overlay
+
+    if ensemble:
+        OCR.OCR_ENSEMBLE = ensemble   # page | line
+    available = {
+        "tesseract": True,
+        "paddle": bool(OCR._HAS_PADDLE),
+        "paddle-onnx": bool(OCR._HAS_ONNX) and OCR.PADDLE_BACKEND == "onnx",
+        "easyocr": bool(OCR._HAS_EASYOCR),
+    }
+    wanted = engines or [k for k, v in available.items() if v]
+    engines = [e for e in wanted if available.get(e)]
+    use_paddle = "paddle" in engines or "paddle-onnx" in engines
+    use_easyocr = "easyocr" in engines
+
+    files = iter_corpus(corpus, limit)
+    if not files:
+        raise SystemExit(f"코퍼스에 처리할 파일이 없습니다: {corpus}")
+
+    timings: Dict[str, List[float]] = {s: [] for s in STAGES}
+    page_ms: List[float] = []
+    accuracy: Dict[str, List[float]] = {e: [] for e in engines}
+    chosen: Dict[str, int] = {}
+    errors: List[Dict[str, str]] = []
+    with _scratch(OCR, "docassistant_bench_") as out_dir:
+        def _one(path: Path, record: bool) -> None:
+            raw = path.read_bytes()
+            f = _CorpusFile(path)
+            sink = timings if record else {s: [] for s in STAGES}
+            t_page = time.perf_counter()
+
+            # 1) 단일 업로드 OCR(세그멘트 없음)
+            res = _timed(sink["upload_ocr"], OCR.run_ocr_on_upload, f, raw,
+                         use_paddle=use_paddle, use_easyocr=use_easyocr)
+
+            # 2) PNG 변환 → 3) 레이아웃
+            png = _timed(sink["rasterize"], OCR.save_upload_to_png, f, raw)
+            layout = _timed(sink["segment"], segment_layout, png)
+
+            # 4) 텍스트 블록 영역 OCR(스크립트/방향은 서비스 경로처럼 페이지당 1회 감지, 시간에 포함)
+            t0 = time.perf_counter()
+            texts = [b for b in layout.get("blocks", []) if (b.get("type") or "").lower() == "text"]
+            if texts and OCR.OCR_DETECT == "page":
+                script = OCR.detect_page_script(png)
+                kw = {"lang": script["lang"], "rotate": script["rotate"]}
+            else:
+                kw = {"lang": "auto"}
+            for b in texts:
+                OCR.ocr_text_region(png, b["bbox"], **kw)
+            sink["region_ocr"].append((time.perf_counter() - t0) * 1000.0)
+
+            # 5) 오버레이
+            _timed(sink["overlay"], save_overlay, png, layout, str(out_dir / f"{path.stem}_overlay.png"))
+
+            if not record:
+                return
+            page_ms.append((time.perf_counter() - t_page) * 1000.0)
+            eng = res.get("meta", {}).get("engine") or "none"
+            chosen[eng] = chosen.get(eng, 0) + 1
+
+            # 정답이 있으면 엔진별 정확도(동일 전처리 이미지 기준)
+            gt = _ground_truth(path)
+            if gt is None:
+                return
+            img = OCR.preprocess_doc(png, mode="doc")
+            for e in engines:
+                try:
+                    if e == "tesseract":
+                        txt, _ = OCR._ocr_with_conf_tesseract(img)
+                    elif e == "paddle":
+                        txt, _ = OCR._ocr_with_paddle(img)
+                    elif e == "paddle-onnx":
+                        txt, _ = OCR._ocr_with_onnx(img)
+                    else:
+                        txt, _ = OCR._ocr_with_easyocr(img)
+                except Exception as ex:
+                    errors.append({"file": path.name, "stage": f"accuracy:{e}", "error": str(ex)})
+                    continue
+                accuracy[e].append(char_error_rate(OCR.normalize_ocr_text(txt or ""), gt))
+
+        for path in files[:warmup]:
+            try:
+                _one(path, record=False)
+            except Exception:
+                pass
+
+        t_all = time.perf_counter()
+        for path in files:
+            try:
+                _one(path, record=True)
+            except Exception as ex:
+                errors.append({"file": path.name, "stage": "pipeline", "error": f"{type(ex).__name__}: {ex}"})
+        wall = time.perf_counter() - t_all
+
+    pages = len(page_ms)
+    return {
+        "bench_version": BENCH_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "env": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "tesseract": _tesseract_version(OCR),
+            "engines": engines,
+            "ensemble": OCR.OCR_ENSEMBLE,
+        },
+        "corpus": {"root": str(corpus), "files": [p.name for p in files]},
+        "pages": pages,
+        "wall_s": round(wall, 3),
+        "throughput_pps": round(pages / wall, 4) if wall > 0 else 0.0,
+        "page": _summary(page_ms),
+        "stages": {s: _summary(v) for s, v in timings.items()},
+        "peak_rss_mb": _peak_rss_mb(),
+        "chosen_engine": chosen,
+        "accuracy": {
+            e: {"n": len(v), "cer": round(sum(v) / len(v), 4), "acc": round(1 - sum(v) / len(v), 4)}
+            for e, v in accuracy.items() if v
+        },
+        "errors": errors,
+    }
+
+
+# ================= 기준 비교 =================
+def compare(result: Dict[str, Any], baseline: Dict[str, Any],
+            tolerance: float = 0.2, cer_tolerance: float = 0.02) -> List[str]:
+    """
+    회귀 항목 목록 반환(빈 리스트면 통과)
+    - 지연(p95)·RSS: baseline * (1 + tolerance) 초과 시 회귀
+    - 처리량: baseline * (1 - tolerance) 미만 시 회귀
+    - CER: baseline + cer_tolerance 초과 시 회귀
+    """
+    regressions: List[str] = []
+
+    def _worse(name: str, cur: float, base: float, higher_is_worse: bool = True) -> None:
+        if not base:
+            return
+        if higher_is_worse and cur > base * (1 + tolerance):
+            regressions.append(f"{name}: {base} → {cur} (+{(cur / base - 1) * 100:.1f}%)")
+        if not higher_is_worse and cur < base * (1 - tolerance):
+            regressions.append(f"{name}: {base} → {cur} ({(cur / base - 1) * 100:.1f}%)")
+
+    _worse("throughput_pps", result.get("throughput_pps", 0), baseline.get("throughput_pps", 0), False)
+    _worse("peak_rss_mb", result.get("peak_rss_mb", 0), baseline.get("peak_rss_mb", 0))
+    for stage, base in baseline.get("stages", {}).items():
+        cur = result.get("stages", {}).get(stage)
+        if cur:
+            _worse(f"{stage}.p95_ms", cur["p95_ms"], base.get("p95_ms", 0))
+    for eng, base in baseline.get("accuracy", {}).items():
+        cur = result.get("accuracy", {}).get(eng)
+        if cur and cur["cer"] > base["cer"] + cer_tolerance:
+            regressions.append(f"{eng}.cer: {base['cer']} → {cur['cer']}")
+    return regressions
+
+
+# ================= 후처리 마이크로 벤치마크 =================
+_TEXT_SAMPLES = (
+    "데이터 분석 결과는 다음과 같다.",
+    "본 문서는  OCR 테스트용 , 샘플 입니다",
+    "1. 첫 번째 항목",
+    "- bullet item : value",
+    "2025년 11월",
+    "12일 기준 ,",
+    "매출은 증가했다!",
+    "",
+    "(참고) the quick brown fox",
+    "jumps over the lazy dog .",
+    "\t탭  으로  구분된   열",
+    "",
+    "",
+    "Ｆｕｌｌｗｉｄｔｈ　ｔｅｘｔ？",
+)
+
+
+def make_text(lines: int, seed: int = 0) -> str:
+    import random
+    rnd = random.Random(seed)
+    return "\n".join(rnd.choice(_TEXT_SAMPLES) for _ in range(lines))
+
+
+def run_text_benchmark(lines: int = 100_000, repeat: int = 3, check: bool = True) -> Dict[str, Any]:
+    """
+    normalize_ocr_text 를 lines/10, lines 크기 입력으로 측정해 선형성(ratio≈10) 확인.
+    check=True 면 기존 경로(_postprocess → clean_ocr_text)와 출력이 같은지 검증.
+    """
+    from utils.text_cleaner import clean_ocr_text, normalize_ocr_text, normalize_ocr_texts
+
+    def _best(fn: Callable, arg) -> float:
+        out = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn(arg)
+            out.append((time.perf_counter() - t0) * 1000.0)
+        return min(out)
+
+    small, large = make_text(max(1, lines // 10)), make_text(lines)
+    t_small = _best(normalize_ocr_text, small)
+    t_large = _best(normalize_ocr_text, large)
+    blocks = [make_text(50, seed=i) for i in range(max(1, lines // 50))]
+    res: Dict[str, Any] = {
+        "lines": lines,
+        "normalize_ms": {"small": round(t_small, 2), "large": round(t_large, 2)},
+        "scale_ratio": round(t_large / t_small, 2) if t_small else 0.0,
+        "batch_ms": round(_best(normalize_ocr_texts, blocks), 2),
+        "batch_blocks": len(blocks),
+    }
+
+    if check:
+        from services.ocr_service import _postprocess
+        legacy = lambda t: clean_ocr_text(_postprocess(t))
+        res["legacy_ms"] = round(_best(legacy, large), 2)
+        mismatches = [i for i, b in enumerate(blocks) if normalize_ocr_text(b) != legacy(b)]
+        if normalize_ocr_text(large) != legacy(large):
+            mismatches.append("large")
+        res["equivalent"] = not mismatches
+        res["mismatches"] = mismatches[:10]
+    return res
+
+
+# ================= Paddle 백엔드 비교 =================
+PADDLE_BACKENDS = ("paddle", "onnx")
+
+
+def run_backend_benchmark(backend: str, corpus: Path, limit: int | None = None) -> Dict[str, Any]:
+    """
+    단일 백엔드 측정(별도 프로세스에서 호출해야 RSS가 섞이지 않음).
+    - import_ms: ocr_service 모듈 import(모델은 지연 로딩이라 포함되지 않음)
+    - init_ms: 해당 백엔드 모델 로딩만(코퍼스 래스터화는 제외)
+    - page: 페이지별 엔진 호출 지연
+    """
+    t0 = time.perf_counter()
+    from services import ocr_service as OCR
+    import_ms = (time.perf_counter() - t0) * 1000.0
+    fn = OCR._ocr_with_onnx if backend == "onnx" else OCR._ocr_with_paddle
+
+    files = iter_corpus(corpus, limit)
+    if not files:
+        raise SystemExit(f"코퍼스에 처리할 파일이 없습니다: {corpus}")
+    imgs = []
+    with _scratch(OCR, "docassistant_backend_"):
+        for path in files:
+            png = OCR.save_upload_to_png(_CorpusFile(path), path.read_bytes())
+            img = OCR.preprocess_doc(png, mode="doc")
+            img.load()      # 임시 PNG 삭제 전에 픽셀 확보
+            imgs.append(img)
+
+    t0 = time.perf_counter()
+    OCR.warmup(use_paddle=True, use_easyocr=False, paddle_backend=backend)
+    init_ms = (time.perf_counter() - t0) * 1000.0
+    first_text, _ = fn(imgs[0])
+    if first_text is None:
+        return {"backend": backend, "available": False}
+
+    page_ms: List[float] = []
+    for img in imgs:
+        _timed(page_ms, fn, img)
+    return {
+        "backend": backend,
+        "available": True,
+        "import_ms": round(import_ms, 2),
+        "init_ms": round(init_ms, 2),
+        "page": _summary(page_ms),
+        "peak_rss_mb": _peak_rss_mb(),
+        "onnx": {k: os.getenv(k) for k in ("ONNX_OCR_DIR", "ONNX_INTRA_THREADS",
+                                           "ONNX_INTER_THREADS", "ONNX_INT8", "ONNX_REC_BATCH")}
+        if backend == "onnx" else None,
+    }
+
+
+def compare_backends(corpus: Path, limit: int | None = None) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for backend in PADDLE_BACKENDS:
+        cmd = [sys.executable, "-m", "utils.bench", "_backend", backend, str(corpus)]
+        if limit:
+            cmd += ["--limit", str(limit)]
+        proc = subprocess.run(cmd, capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        try:
+            out[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+        except Exception:
+            out[backend] = {"backend": backend, "available": False, "error": proc.stderr[-500:]}
+    return out
+
+
+# ================= DB 저장 벤치마크 =================
+def run_db_benchmark(records: int = 2000, concurrency: int = 32) -> Dict[str, Any]:
+    """
+    임시 SQLite 파일에서 동시 요청 concurrency개가 records건을 저장할 때
+    - sync: 요청마다 crud.create_ocr_record(스레드에서 add → commit)
+    - write_behind: db_writer.WriteBehindWriter (배치 트랜잭션)
+    의 처리량과 요청별 p50/p95 지연 비교
+    """
+    import asyncio
+    tmp = tempfile.TemporaryDirectory(prefix="docassistant_dbbench_")
+    os.environ["DB_PROFILE"] = "sqlite"
+    os.environ["SQLITE_PATH"] = os.path.join(tmp.name, "bench.db")
+    from db import SessionLocal, init_sqlite_schema, engine, async_engine
+    from crud import create_ocr_record
+    from db_writer import WriteBehindWriter
+    init_sqlite_schema()
+
+    def _fields(i: int) -> Dict[str, Any]:
+        return {"filename": f"bench_{i}.png", "raw_text": "텍스트 " * 20,
+                "parsed": {"engine": "tesseract", "score": 90.0}, "score": 0, "tier": "N/A"}
+
+    def _sync_one(i: int) -> int:
+        db = SessionLocal()
+        try:
+            f = _fields(i)
+            return create_ocr_record(db, filename=f["filename"], raw_text=f["raw_text"],
+                                     parsed=f["parsed"], score=0, tier="N/A").id
+        finally:
+            db.close()
+
+    async def _drive(call) -> Dict[str, Any]:
+        sem = asyncio.Semaphore(concurrency)
+        lat: List[float] = []
+
+        async def one(i: int) -> None:
+            async with sem:
+                t0 = time.perf_counter()
+                await call(i)
+                lat.append((time.perf_counter() - t0) * 1000.0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(records)))
+        wall = time.perf_counter() - t0
+        return {"records_per_s": round(records / wall, 1), **_summary(lat)}
+
+    async def _main() -> Dict[str, Any]:
+        sync = await _drive(lambda i: asyncio.to_thread(_sync_one, i))
+        w = WriteBehindWriter()
+        w.start()
+        wb = await _drive(lambda i: w.create(**_fields(i)))
+        await w.close()
+        wb["writer"] = dict(w.stats)
+        if async_engine is not None:
+            await async_engine.dispose()
+        return {"sync": sync, "write_behind": wb}
+
+    try:
+        res = asyncio.run(_main())
+    finally:
+        engine.dispose()
+        tmp.cleanup()
+    res.update({"records": records, "concurrency": concurrency})
+    return res
+
+
+def _print_report(res: Dict[str, Any]) -> None:
+    print(f"pages={res['pages']}  wall={res['wall_s']}s  throughput={res['throughput_pps']} pages/s"
+          f"  peak_rss={res['peak_rss_mb']}MB  engines={','.join(res['env']['engines'])}")
+    for s, v in res["stages"].items():
+        print(f"  {s:<11} p50={v['p50_ms']:>9}ms  p95={v['p95_ms']:>9}ms  n={v['n']}")
+    for e, v in res.get("accuracy", {}).items():
+        print(f"  [acc] {e:<9} cer={v['cer']}  acc={v['acc']}  n={v['n']}")
+    for err in res.get("errors", []):
+        print(f"  [err] {err['file']} ({err['stage']}): {err['error']}")
+
+
+def _report_regressions(regs: List[str]) -> int:
+    if regs:
+        print("❌ 회귀 감지:")
+        for r in regs:
+            print(f"  - {r}")
+        return 1
+    print("✅ 기준 대비 회귀 없음")
+    return 0
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m utils.bench", description="OCR 파이프라인 벤치마크")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("run", help="코퍼스 실행 후 결과 JSON 저장")
+    r.add_argument("corpus", nargs="?", default="captures")
+    r.add_argument("--out", default="bench.json")
+    r.add_argument("--baseline")
+    r.add_argument("--engines", help="쉼표 구분(tesseract,paddle,paddle-onnx,easyocr). 기본: 설치된 전체")
+    r.add_argument("--limit", type=int)
+    r.add_argument("--warmup", type=int, default=1)
+    r.add_argument("--tolerance", type=float, default=0.2)
+    r.add_argument("--cer-tolerance", type=float, default=0.02, help="CER 허용 증가량(절대값)")
+    r.add_argument("--ensemble", choices=("page", "line"), help="ocr_best 앙상블 방식(기본: OCR_ENSEMBLE)")
+
+    c = sub.add_parser("compare", help="결과 JSON 두 개 비교")
+    c.add_argument("result")
+    c.add_argument("baseline")
+    c.add_argument("--tolerance", type=float, default=0.2)
+    c.add_argument("--cer-tolerance", type=float, default=0.02, help="CER 허용 증가량(절대값)")
+
+    t = sub.add_parser("text", help="후처리 마이크로 벤치마크")
+    t.add_argument("--lines", type=int, default=100_000)
+    t.add_argument("--repeat", type=int, default=3)
+    t.add_argument("--no-check", action="store_true", help="기존 경로와의 출력 비교 생략")
+
+    b = sub.add_parser("backends", help="Paddle 백엔드(paddleocr vs onnx) 비교")
+    b.add_argument("corpus", nargs="?", default="captures")
+    b.add_argument("--out", default="backends.json")
+    b.add_argument("--limit", type=int)
+
+    d = sub.add_parser("db", help="레코드 저장(sync vs write-behind) 비교, 임시 SQLite")
+    d.add_argument("--records", type=int, default=2000)
+    d.add_argument("--concurrency", type=int, default=32)
+
+    bb = sub.add_parser("_backend")   # 내부용: 단일 백엔드 측정 후 JSON 한 줄 출력
+    bb.add_argument("backend", choices=PADDLE_BACKENDS)
+    bb.add_argument("corpus")
+    bb.add_argument("--limit", type=int)
+
+    args = ap.parse_args(argv)
+
+    if args.cmd == "db":
+        print(json.dumps(run_db_benchmark(args.records, args.concurrency), ensure_ascii=False, indent=2))
+        return 0
+
+    if args.cmd == "_backend":
+        print(json.dumps(run_backend_benchmark(args.backend, Path(args.corpus), args.limit), ensure_ascii=False))
+        return 0
+
+    if args.cmd == "backends":
+        res = compare_backends(Path(args.corpus), args.limit)
+        Path(args.out).write_text(json.dumps(res, ensure_ascii=False, indent=2), encoding="utf-8")
+        for name, r in res.items():
+            if not r.get("available"):
+                print(f"  {name:<7} (사용 불가) {r.get('error', '')[:200]}")
+                continue
+            print(f"  {name:<7} init={r['init_ms']}ms  p50={r['page']['p50_ms']}ms"
+                  f"  p95={r['page']['p95_ms']}ms  peak_rss={r['peak_rss_mb']}MB")
+        print(f"→ {args.out}")
+        return 0
+
+    if args.cmd == "text":
+        res = run_text_benchmark(args.lines, args.repeat, check=not args.no_check)
+        print(json.dumps(res, ensure_ascii=False, indent=2))
+        # 10배 입력에서 20배 이상 느려지면 비선형으로 판단
+        if res["scale_ratio"] > 20 or not res.get("equivalent", True):
+            return 1
+        return 0
+
+    if args.cmd == "compare":
+        res = json.loads(Path(args.result).read_text(encoding="utf-8"))
+        base = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return _report_regressions(compare(res, base, args.tolerance, args.cer_tolerance))
+
+    engines = [e.strip() for e in args.engines.split(",")] if args.engines else None
+    res = run_benchmark(Path(args.corpus), engines=engines, limit=args.limit, warmup=args.warmup,
+                        ensemble=args.ensemble)
+    Path(args.out).write_text(json.dumps(res, ensure_ascii=False, indent=2), encoding="utf-8")
+    _print_report(res)
+    print(f"→ {args.out}")
+    if args.baseline:
+        base = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        return _report_regressions(compare(res, base, args.tolerance, args.cer_tolerance))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
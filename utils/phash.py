@@ -0,0 +1,166 @@
+# utils/phash.py
+"""
+페이지 지각 해시(pHash) + 해밍 거리 근접 검색(multi-index hashing).
+
+- phash: 32×32 그레이 → 2D DCT → 저주파 8×8(DC 제외 중앙값 기준) → 64bit
+  같은 양식을 다시 스캔/다른 DPI로 재출력/재촬영해도 거리 0~6 수준
+- MultiIndexHash: 64bit를 16bit 조각 4개로 나눠 조각별 해시 테이블
+  거리 r 이내 후보는 적어도 한 조각이 r//4 이내(비둘기집) → 조각 이웃만 조회 후 popcount 검증
+  (균일 분포 기준 100만 건에서 버킷당 ~15건 → 조회 수백 µs 이내)
+- PageHashIndex: append-only 파일(<Q8s> = 해시, doc_key) 기반. 여러 프로세스가 추가해도
+  조회 전에 파일 꼬리만 읽어 동기화
+"""
+from __future__ import annotations
+
+import os, struct, threading
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+_CHUNK_MASK = (1 << CHUNK_BITS) - 1
+_RECORD = struct.Struct("<Q8s")
+
+
+# ================= 해시 =================
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0] /= np.sqrt(2.0)
+    return m
+
+_DCT32 = _dct_matrix(32)
+
+
+def phash(img: Image.Image | str | os.PathLike) -> int:
+    """이미지(또는 경로) → 64bit 지각 해시"""
+    if not isinstance(img, Image.Image):
+        img = Image.open(img)
+    # 큰 페이지는 draft/thumbnail로 먼저 줄여 리샘플 비용 절감
+    img.draft("L", (256, 256))
+    small = img.convert("L").resize((32, 32), Image.BILINEAR)
+    px = np.asarray(small, dtype=np.float64)
+    coef = (_DCT32 @ px @ _DCT32.T)[:8, :8].ravel()
+    med = np.median(coef[1:])
+    h = 0
+    for bit in (coef > med):
+        h = (h << 1) | int(bit)
+    return h
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _ball(value: int, radius: int, bits: int = CHUNK_BITS) -> List[int]:
+    """value에서 해밍 거리 radius 이내의 모든 값"""
+    out = [value]
+    for r in range(1, radius + 1):
+        for flips in combinations(range(bits), r):
+            v = value
+            for f in flips:
+                v ^= 1 << f
+            out.append(v)
+    return out
+
+
+# ================= 인덱스 =================
+class MultiIndexHash:
+    """64bit 해시 → 값(doc_key 등) 근접 검색"""
+
+    def __init__(self):
+        self.hashes: List[int] = []
+        self.values: List[str] = []
+        self.tables: List[Dict[int, List[int]]] = [{} for _ in range(CHUNKS)]
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def add(self, h: int, value: str) -> None:
+        pos = len(self.hashes)
+        self.hashes.append(h)
+        self.values.append(value)
+        for c, table in enumerate(self.tables):
+            table.setdefault((h >> (c * CHUNK_BITS)) & _CHUNK_MASK, []).append(pos)
+
+    def query(self, h: int, radius: int) -> List[Tuple[int, str]]:
+        """거리 radius 이내 [(distance, value), ...] 가까운 순"""
+        sub_r = radius // CHUNKS
+        seen, out = set(), []
+        for c, table in enumerate(self.tables):
+            for key in _ball((h >> (c * CHUNK_BITS)) & _CHUNK_MASK, sub_r):
+                for pos in table.get(key, ()):
+                    if pos in seen:
+                        continue
+                    seen.add(pos)
+                    d = (self.hashes[pos] ^ h).bit_count()
+                    if d <= radius:
+                        out.append((d, self.values[pos]))
+        out.sort()
+        return out
+
+
+class PageHashIndex:
+    """append-only 파일 기반 페이지 해시 인덱스(doc_key = 16자리 hex)"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.mih = MultiIndexHash()
+        self._pos: Dict[str, int] = {}       # doc_key → 등록 순서
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def _sync(self) -> None:
+        # 다른 프로세스가 추가한 꼬리만 읽음
+        if not self.path.exists():
+            return
+        size = self.path.stat().st_size
+        if size <= self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        usable = len(data) - len(data) % _RECORD.size   # 쓰는 중인 레코드는 다음에
+        for h, key in _RECORD.iter_unpack(data[:usable]):
+            key = key.hex()
+            if key not in self._pos:
+                self._pos[key] = len(self._pos)
+                self.mih.add(h, key)
+        self._offset += usable
+
+    def add(self, h: int, doc_key: str) -> bool:
+        """등록(이미 있으면 False)"""
+        with self._lock:
+            self._sync()
+            if doc_key in self._pos:
+                return False
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, _RECORD.pack(h, bytes.fromhex(doc_key)))
+            finally:
+                os.close(fd)
+            return True
+
+    def lookup(self, h: int, radius: int, exclude: str | None = None,
+               before: str | None = None) -> List[Tuple[int, str]]:
+        """
+        거리 radius 이내 [(distance, doc_key), ...].
+        before: 이 문서보다 먼저 등록된 문서만(재실행해도 이후 업로드에 따라 결과가 바뀌지 않도록)
+        """
+        with self._lock:
+            self._sync()
+            limit = self._pos.get(before) if before is not None else None
+            return [(d, k) for d, k in self.mih.query(h, radius)
+                    if k != exclude and (limit is None or self._pos[k] < limit)]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return len(self.mih)
@@ -11,6 +11,7 @@ _SPACE_BEFORE= re.compile(r'\s+([,.;:!?%)\]”])')                # 구두점 
 _SPACE_AFTER = re.compile(r'([(\[“])\s+')                       # 괄호 뒤 공백
 _MULTI_SPACE = re.compile(r'[ \t]{2,}')                         # 다중 공백
 _MULTI_NL    = re.compile(r'\n{3,}')                            # 다중 빈줄
+_KO_START    = re.compile(r'^[가-힣]')                           # 한글로 시작하는 줄
 
 # ==============================
 # OCR 후처리 핵심 함수
@@ -33,15 +34,14 @@ def clean_ocr_text(text: str) -> str:
     t = _HYPHEN_BR.sub(r'\1\2', t)
 
     # 3. 줄 단위 분리
-    lines, out, buf = t.splitlines(), [], ""
+    lines, out, buf = t.splitlines(), [], []
 
     def flush():
         """현재 문장 버퍼를 출력 목록에 추가"""
-        nonlocal buf
-        s = buf.strip()
+        s = " ".join(buf).strip()
         if s:
             out.append(s)
-        buf = ""
+        buf.clear()
 
     # 4. 문장 단위 재조립
     for ln in lines:
@@ -54,19 +54,19 @@ def clean_ocr_text(text: str) -> str:
             continue
 
         # 버퍼가 비어 있으면 새 문장 시작
-        if not buf:
-            buf = ln
+        if not buf or not buf[0]:
+            buf[:] = [ln]
             continue
 
         # 버퍼가 문장 끝이 아니면 다음 줄 이어붙임
-        if not _KO_SENT_END.search(buf):
-            if ln and (ln[0].islower() or ln[0].isdigit() or ln[0] in '([{"\'' or re.match(r'^[가-힣]', ln)):
-                buf = buf + " " + ln.strip()
+        if not _KO_SENT_END.search(buf[-1]):
+            if ln and (ln[0].islower() or ln[0].isdigit() or ln[0] in '([{"\'' or _KO_START.match(ln)):
+                buf.append(ln.strip())
                 continue
 
         # 문장 끝났으면 flush 후 새 줄 시작
         flush()
-        buf = ln
+        buf.append(ln)
     flush()
 
     # 5. 구두점 주변 공백 보정
@@ -79,3 +79,97 @@ def clean_ocr_text(text: str) -> str:
     t = _MULTI_NL.sub('\n\n', t)
 
     return t.strip()
+
+
+# ==============================
+# 단일 패스 정규화 (ocr_service._postprocess + clean_ocr_text 통합)
+# ==============================
+_PP_MULTI_SPACE = re.compile(r'[ \t]{2,}')                      # 다중 공백(줄 내부)
+_PP_SPACE_PUNCT = re.compile(r' ([,:.])')                       # " ," " :" " ." 보정
+_RARE_BREAKS    = re.compile('[\x0b\x0c\x1c-\x1e\x85\u2028\u2029]')  # splitlines 전용 줄바꿈 문자
+_PP_SENT_END    = frozenset('.!?')
+
+
+def _is_ko_digit(c: str) -> bool:
+    return '가' <= c <= '힣' or '0' <= c <= '9'
+
+
+def _postprocess_lines(text: str) -> list:
+    """
+    _postprocess 규칙을 줄(세그먼트) 단위 1회 스캔으로 적용하고,
+    최종 줄바꿈 기준으로 나뉜 줄 목록을 반환.
+      - 줄 내부 규칙(다중 공백, 구두점 앞 공백)은 사전 컴파일 정규식 1회
+      - 3줄 이상 빈 줄 축약 / 한글·숫자 사이 줄바꿈 제거 / 문장부호 외 줄바꿈 → 공백
+        은 인접 세그먼트의 첫/끝 문자만 보고 결정
+    """
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _PP_SPACE_PUNCT.sub(r'\1', _PP_MULTI_SPACE.sub(' ', text))
+    raw = text.split("\n")
+
+    # \n{3,} → \n\n : 내부 빈 세그먼트 연속은 1개만 유지
+    last = len(raw) - 1
+    segs, blank = [], 0
+    for i, s in enumerate(raw):
+        if not s and 0 < i < last:
+            blank += 1
+            if blank > 1:
+                continue
+        else:
+            blank = 0
+        segs.append(s)
+
+    lines, cur = [], []
+    n = len(segs)
+    for i, s in enumerate(segs):
+        if i == n - 1:
+            cur.append(s)
+            break
+        nxt = segs[i + 1]
+        if nxt and _is_ko_digit(nxt[0]) and s and (
+            _is_ko_digit(s[-1]) or (s[-1] == ',' and len(s) > 1 and _is_ko_digit(s[-2]))
+        ):
+            # 문장 중간 줄바꿈 제거(직전 쉼표 포함)
+            cur.append(s[:-1] if s[-1] == ',' else s)
+        elif (s and s[-1] in _PP_SENT_END) or (not nxt and i + 1 < n - 1):
+            # 문장 부호 뒤 / 빈 줄 앞 줄바꿈 유지
+            cur.append(s)
+            lines.append("".join(cur))
+            cur = []
+        else:
+            cur.append(s)
+            cur.append(" ")
+    lines.append("".join(cur))
+    return lines
+
+
+def normalize_ocr_text(text: str) -> str:
+    """
+    OCR 원문 → 최종 텍스트 단일 패스 정규화.
+    clean_ocr_text(_postprocess(text)) 와 동일한 결과를 선형 시간에 생성한다.
+      - _postprocess 가 남긴 줄바꿈은 항상 문장 끝/빈 줄 경계이므로
+        clean_ocr_text 의 문장 재조립은 줄별 strip + 빈 줄 제거로 귀결됨
+      - splitlines 전용 줄바꿈 문자(\\x0c, \\u2028 등)가 섞인 드문 입력만
+        clean_ocr_text 전체 경로로 처리
+    """
+    if not text:
+        return ""
+    lines = _postprocess_lines(text)
+    if _RARE_BREAKS.search(text):
+        return clean_ocr_text("\n".join(lines).strip())
+
+    out = []
+    for ln in lines:
+        ln = unicodedata.normalize("NFKC", ln).strip()
+        if ln:
+            out.append(ln)
+
+    t = "\n".join(out)
+    t = _SPACE_BEFORE.sub(r'\1', t)
+    t = _SPACE_AFTER.sub(r'\1', t)
+    t = _MULTI_SPACE.sub(' ', t)
+    return t.strip()
+
+
+def normalize_ocr_texts(texts) -> list:
+    """여러 블록 텍스트 일괄 정규화(입력 순서 유지, None/빈 값은 "")"""
+    return [normalize_ocr_text(t) if t else "" for t in texts]
@@ -0,0 +1,201 @@
+# utils/word_geometry.py
+"""
+단어/줄 박스 저장소(컬럼형 바이너리) + 격자(grid) 공간 인덱스.
+
+파일 형식(.wgeo, little-endian):
+  header  <4sHHII>  magic "WGEO", version, cell(격자 크기 px), count, text_bytes
+  x1 y1 x2 y2       int32[count] × 4   (페이지 좌표 = rasterize page.png 기준, v1은 int16)
+  conf              float32[count]     (0~100, 미상 -1)
+  block             int16[count]       (레이아웃 블록 번호, 1부터)
+  level             uint8[count]       (0=단어, 1=줄)
+  text_off          uint32[count+1]    (text 블롭 내 오프셋)
+  text              utf-8 blob
+
+- 단어 하나에 약 28B + 텍스트 → 같은 내용의 JSON 대비 수 배 작음
+- v2: 좌표 int32(짧은 변만 제한되므로 긴 스크롤/영수증은 32767px를 넘을 수 있음). v1(int16) 파일도 읽음
+- 조회: 셀에 걸친 박스 목록만 검사 → 사각형/점 질의가 수 µs
+"""
+from __future__ import annotations
+
+import struct, sys, unicodedata
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+
+MAGIC = b"WGEO"
+VERSION = 2
+DEFAULT_CELL = 64
+_HEADER = struct.Struct("<4sHHII")
+_COORD = {1: "h", 2: "i"}      # 버전별 좌표 타입
+
+LEVEL_WORD, LEVEL_LINE = 0, 1
+
+
+def _le(arr: array) -> array:
+    # 파일은 항상 little-endian
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr
+
+
+def _coord(v) -> int:
+    return int(round(v))
+
+
+def _fold(s: str) -> str:
+    """검색용 정규화(NFKC + 대소문자 무시)"""
+    return unicodedata.normalize("NFKC", s).casefold()
+
+
+class WordGeometry:
+    """
+    단어/줄 박스 컬럼 저장소.
+    words 항목 형식: [x1, y1, x2, y2, conf, text, level] (+ block 은 from_blocks로 지정)
+    """
+
+    def __init__(self, cell: int = DEFAULT_CELL):
+        self.cell = cell
+        self.x1, self.y1, self.x2, self.y2 = array("i"), array("i"), array("i"), array("i")
+        self.conf = array("f")
+        self.block = array("h")
+        self.level = array("B")
+        self.text_off = array("I", [0])
+        self.text_blob = b""
+        self._grid: Dict[tuple, List[int]] | None = None
+        self._folded: List[str] | None = None
+
+    # ---------------- 생성 ----------------
+    @classmethod
+    def from_blocks(cls, blocks: Dict[str, Sequence[Sequence[Any]]], cell: int = DEFAULT_CELL) -> "WordGeometry":
+        """{블록 번호(str/int): [[x1,y1,x2,y2,conf,text,level], ...]} → 저장소(블록/읽기 순서 유지)"""
+        g = cls(cell)
+        texts = bytearray()
+        for key in sorted(blocks, key=lambda k: int(k)):
+            for w in blocks[key] or []:
+                x1, y1, x2, y2 = w[0], w[1], w[2], w[3]
+                g.x1.append(_coord(x1)); g.y1.append(_coord(y1))
+                g.x2.append(_coord(x2)); g.y2.append(_coord(y2))
+                g.conf.append(float(w[4]) if len(w) > 4 and w[4] is not None else -1.0)
+                g.block.append(int(key))
+                g.level.append(int(w[6]) if len(w) > 6 else LEVEL_WORD)
+                texts += str(w[5] if len(w) > 5 else "").encode("utf-8")
+                g.text_off.append(len(texts))
+        g.text_blob = bytes(texts)
+        return g
+
+    # ---------------- 직렬화 ----------------
+    def to_bytes(self) -> bytes:
+        n = len(self)
+        parts = [_HEADER.pack(MAGIC, VERSION, self.cell, n, len(self.text_blob))]
+        for col in (self.x1, self.y1, self.x2, self.y2, self.conf, self.block, self.level, self.text_off):
+            parts.append(_le(array(col.typecode, col)).tobytes())
+        parts.append(self.text_blob)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "WordGeometry":
+        magic, version, cell, n, text_len = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version not in _COORD:
+            raise ValueError(f"지원하지 않는 형식: {magic!r} v{version}")
+        g = cls(cell)
+        pos = _HEADER.size
+        c = _COORD[version]
+        for name, typecode, count in (
+            ("x1", c, n), ("y1", c, n), ("x2", c, n), ("y2", c, n),
+            ("conf", "f", n), ("block", "h", n), ("level", "B", n), ("text_off", "I", n + 1),
+        ):
+            col = array(typecode)
+            size = col.itemsize * count
+            col.frombytes(data[pos:pos + size])
+            col = _le(col)
+            setattr(g, name, array("i", col) if typecode == "h" else col)
+            pos += size
+        g.text_blob = bytes(data[pos:pos + text_len])
+        return g
+
+    def save(self, path: str | Path) -> int:
+        data = self.to_bytes()
+        Path(path).write_bytes(data)
+        return len(data)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "WordGeometry":
+        return cls.from_bytes(Path(path).read_bytes())
+
+    # ---------------- 접근 ----------------
+    def __len__(self) -> int:
+        return len(self.x1)
+
+    def text(self, i: int) -> str:
+        return self.text_blob[self.text_off[i]:self.text_off[i + 1]].decode("utf-8")
+
+    def item(self, i: int) -> Dict[str, Any]:
+        return {
+            "i": i,
+            "bbox": [self.x1[i], self.y1[i], self.x2[i], self.y2[i]],
+            "text": self.text(i),
+            "conf": round(self.conf[i], 1),
+            "block": self.block[i],
+            "level": "line" if self.level[i] == LEVEL_LINE else "word",
+        }
+
+    def items(self, idxs: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.item(i) for i in idxs]
+
+    # ---------------- 공간 인덱스 ----------------
+    def _index(self) -> Dict[tuple, List[int]]:
+        if self._grid is None:
+            c = self.cell
+            grid: Dict[tuple, List[int]] = {}
+            for i in range(len(self)):
+                for cx in range(self.x1[i] // c, self.x2[i] // c + 1):
+                    for cy in range(self.y1[i] // c, self.y2[i] // c + 1):
+                        grid.setdefault((cx, cy), []).append(i)
+            self._grid = grid
+        return self._grid
+
+    def query_rect(self, x1: float, y1: float, x2: float, y2: float) -> List[int]:
+        """사각형과 겹치는 박스 인덱스(읽기 순서)"""
+        if x2 < x1:
+            x1, x2 = x2, x1
+        if y2 < y1:
+            y1, y2 = y2, y1
+        grid, c = self._index(), self.cell
+        hits = set()
+        for cx in range(int(x1) // c, int(x2) // c + 1):
+            for cy in range(int(y1) // c, int(y2) // c + 1):
+                for i in grid.get((cx, cy), ()):
+                    if self.x1[i] <= x2 and self.x2[i] >= x1 and self.y1[i] <= y2 and self.y2[i] >= y1:
+                        hits.add(i)
+        return sorted(hits)
+
+    def query_point(self, x: float, y: float, tol: float = 0) -> List[int]:
+        """점(±tol px)에 걸친 박스 인덱스 — 면적이 작은(=더 구체적인) 박스 먼저"""
+        hits = self.query_rect(x - tol, y - tol, x + tol, y + tol)
+        return sorted(hits, key=lambda i: (self.x2[i] - self.x1[i]) * (self.y2[i] - self.y1[i]))
+
+    # ---------------- 검색 ----------------
+    def search(self, query: str, limit: int = 200) -> List[List[int]]:
+        """
+        검색어 → 일치 박스 인덱스 묶음 목록.
+        - 박스 하나의 텍스트가 검색어 전체를 포함하면 그 박스(줄 단위 엔진 결과 포함)
+        - 여러 단어 검색어는 같은 블록의 연속 단어가 토큰을 차례로 포함하면 그 단어들
+        """
+        tokens = _fold(query).split()
+        if not tokens:
+            return []
+        if self._folded is None:
+            self._folded = [_fold(self.text(i)) for i in range(len(self))]
+        folded, whole = self._folded, " ".join(tokens)
+        hits: List[List[int]] = []
+        n, k = len(folded), len(tokens)
+        for i in range(n):
+            if whole in folded[i]:
+                hits.append([i])
+            elif k > 1 and i + k <= n and all(
+                self.block[i + j] == self.block[i] and tokens[j] in folded[i + j] for j in range(k)
+            ):
+                hits.append(list(range(i, i + k)))
+            if len(hits) >= limit:
+                break
+        return hits